@@ -0,0 +1,3 @@
+from app.bench.http_load import main
+
+main()
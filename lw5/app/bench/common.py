@@ -0,0 +1,108 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@dataclass
+class RoundTrips:
+    statements: int = 0
+    commits: int = 0
+    rollbacks: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits + self.rollbacks
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "total": self.total}
+
+
+class StatementCounter:
+    """Счетчик обращений к БД через события движка SQLAlchemy"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.sync_engine = engine.sync_engine
+        self.counts = RoundTrips()
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.counts.statements += 1
+        self.statements.append(statement)
+
+    def _on_commit(self, conn):
+        self.counts.commits += 1
+
+    def _on_rollback(self, conn):
+        self.counts.rollbacks += 1
+
+    def reset(self) -> None:
+        self.counts = RoundTrips()
+        self.statements = []
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.sync_engine, "commit", self._on_commit)
+        event.listen(self.sync_engine, "rollback", self._on_rollback)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.sync_engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.sync_engine, "commit", self._on_commit)
+        event.remove(self.sync_engine, "rollback", self._on_rollback)
+
+
+class PoolOccupancy:
+    """Занятость пула соединений через события pool checkout/checkin
+
+    Считает, сколько соединений выдано одновременно (максимум и среднее за
+    время замера) и как долго запрос держит соединение.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.pool = engine.sync_engine.pool
+        self.reset()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._checked_out[id(connection_record)] = time.perf_counter()
+        self.max_checked_out = max(self.max_checked_out, len(self._checked_out))
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = self._checked_out.pop(id(connection_record), None)
+        if started is not None:
+            self.holds.append(time.perf_counter() - started)
+
+    def reset(self) -> None:
+        self._checked_out: Dict[int, float] = {}
+        self._started = time.perf_counter()
+        self.holds: List[float] = []
+        self.max_checked_out = 0
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            # Среднее число выданных соединений: суммарное время удержания / время
+            "pool_avg_checked_out": round(sum(self.holds) / elapsed, 3),
+            "pool_max_checked_out": self.max_checked_out,
+            "pool_hold_p99_ms": round(percentile(self.holds, 99) * 1000, 3),
+        }
+
+    def __enter__(self) -> "PoolOccupancy":
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "checkin", self._on_checkin)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.pool, "checkout", self._on_checkout)
+        event.remove(self.pool, "checkin", self._on_checkin)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
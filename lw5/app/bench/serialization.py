@@ -0,0 +1,93 @@
+"""Стоимость сериализации списка пользователей на одну строку
+
+Запуск:
+    python -m app.bench.serialization --rows 100 --repeat 2000
+
+Сравнивает прежний путь (UserResponse.model_validate для каждого
+ORM-объекта + кодирование списка моделей Litestar) с msgspec Structs из
+ORM-объектов и из строк Row. БД не нужна: объекты и строки собираются
+в памяти. Результат - JSON на stdout, микросекунды на строку.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from litestar.plugins.pydantic import PydanticInitPlugin
+from litestar.serialization import encode_json, get_serializer
+
+from app.models import User
+from app.schemas import UserResponse
+from app.serializers import UserStruct, encode_objects, encode_rows, struct_fields
+
+# Те же кодировщики, что Litestar использует для ответов с Pydantic-моделями
+_litestar_serializer = get_serializer(PydanticInitPlugin.encoders())
+
+
+def make_users(rows: int) -> List[User]:
+    now = datetime.utcnow()
+    return [
+        User(
+            id=i,
+            name=f"Пользователь {i}",
+            email=f"user-{i}@example.com",
+            description=f"Пользователь номер {i}",
+            created_at=now,
+            updated_at=now,
+            version=1,
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+def pydantic_path(users: List[User]) -> bytes:
+    return encode_json(
+        [UserResponse.model_validate(user) for user in users], _litestar_serializer
+    )
+
+
+def timed(function: Callable[[], bytes], repeat: int, rows: int) -> dict:
+    function()  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        payload = function()
+    elapsed = time.perf_counter() - started
+    return {
+        "us_per_row": round(elapsed * 1_000_000 / (repeat * rows), 3),
+        "us_per_response": round(elapsed * 1_000_000 / repeat, 1),
+        "bytes": len(payload),
+    }
+
+
+def run(rows: int, repeat: int) -> dict:
+    users = make_users(rows)
+    fields = struct_fields(UserStruct)
+    row_tuples = [tuple(getattr(user, field) for field in fields) for user in users]
+
+    assert json.loads(pydantic_path(users)) == json.loads(
+        encode_rows(UserStruct, row_tuples)
+    )
+
+    results = {
+        "pydantic_from_orm": timed(lambda: pydantic_path(users), repeat, rows),
+        "msgspec_from_orm": timed(
+            lambda: encode_objects(UserStruct, users), repeat, rows
+        ),
+        "msgspec_from_rows": timed(
+            lambda: encode_rows(UserStruct, row_tuples), repeat, rows
+        ),
+    }
+    baseline = results["pydantic_from_orm"]["us_per_row"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["us_per_row"], 2)
+    return {"rows": rows, "repeat": repeat, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
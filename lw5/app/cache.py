@@ -0,0 +1,173 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class CacheBackend(ABC):
+    """Интерфейс кэша сериализованных ответов (ключ -> bytes)
+
+    Асинхронный, чтобы за ним мог стоять сетевой общий кэш (Redis и т.п.).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: bytes, ttl: Optional[float] = None
+    ) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+    @property
+    @abstractmethod
+    def stats(self) -> CacheStats: ...
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU кэш с TTL и ограничением по количеству записей"""
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self._stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return self._stats
+
+
+class InMemorySharedCache(CacheBackend):
+    """Локальная замена общего кэша (Redis) для разработки и тестов
+
+    Без ограничения размера и LRU - только TTL, как у типичного
+    внешнего key-value хранилища.
+    """
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._clock():
+            self._data.pop(key, None)
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return self._stats
+
+
+class TieredCache(CacheBackend):
+    """Двухуровневый кэш: локальный LRU перед общим бэкендом
+
+    Промах локального уровня читает общий и прогревает локальный.
+    Инвалидация удаляет ключ на обоих уровнях; локальные кэши других
+    процессов устаревают не дольше своего TTL.
+    """
+
+    def __init__(self, local: LRUCache, shared: Optional[CacheBackend] = None):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        value = await self.shared.get(key)
+        if value is not None:
+            await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.local.set(key, value, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    async def clear(self) -> None:
+        await self.local.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.local.stats
@@ -0,0 +1,29 @@
+from litestar import Controller, get
+
+from app.cache import CacheBackend
+from app.replicas import ReplicaSet
+from app.slow_queries import SlowQueryLog
+
+
+class AdminController(Controller):
+    path = "/admin"
+
+    @get("/cache")
+    async def get_cache_stats(
+        self, user_cache: CacheBackend, catalog_cache: CacheBackend
+    ) -> dict:
+        """User and catalog cache hit/miss/eviction counters"""
+        return {
+            "users": user_cache.stats.as_dict(),
+            "products": catalog_cache.stats.as_dict(),
+        }
+
+    @get("/slow-queries")
+    async def get_slow_queries(self, slow_query_log: SlowQueryLog) -> dict:
+        """Recent statements over SLOW_QUERY_THRESHOLD_MS, newest first"""
+        return slow_query_log.snapshot()
+
+    @get("/replicas")
+    async def get_replicas(self, replica_set: ReplicaSet) -> list:
+        """Read replicas and their health (ejected replicas get no reads)"""
+        return replica_set.snapshot()
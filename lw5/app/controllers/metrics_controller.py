@@ -0,0 +1,14 @@
+from litestar import Controller, get
+
+from app.metrics import REGISTRY
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsController(Controller):
+    path = "/metrics"
+
+    @get(media_type=PROMETHEUS_MEDIA_TYPE)
+    async def get_metrics(self) -> str:
+        """Metrics in Prometheus text exposition format"""
+        return REGISTRY.render()
@@ -0,0 +1,24 @@
+from litestar import Controller, post
+
+from app.schemas import OrderCreate, OrderDetailResponse
+from app.services.order_service import OrderService
+
+
+class OrderController(Controller):
+    path = "/orders"
+
+    @post()
+    async def create_order(
+        self,
+        order_service: OrderService,
+        data: OrderCreate,
+    ) -> OrderDetailResponse:
+        """Place an order
+
+        Stock is decremented atomically in the database; 409 is returned when
+        any product does not have enough stock, and nothing is written.
+        """
+        order, items = await order_service.place(data)
+        response = OrderDetailResponse.model_validate(order)
+        response.items = items
+        return response
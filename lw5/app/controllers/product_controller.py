@@ -0,0 +1,136 @@
+from typing import List, Optional
+
+from litestar import Controller, MediaType, Response, get, patch, post
+from litestar.exceptions import NotFoundException, ValidationException
+from litestar.params import Parameter
+
+from app.schemas import (
+    MAX_FILTER_IDS,
+    ProductCreate,
+    ProductResponse,
+    ProductSort,
+    ProductUpdate,
+)
+from app.services.product_service import ProductService
+
+
+class ProductController(Controller):
+    path = "/products"
+
+    @get("/{product_id:int}")
+    async def get_product_by_id(
+        self,
+        product_service: ProductService,
+        product_id: int = Parameter(gt=0, description="Product ID"),
+    ) -> Response[ProductResponse]:
+        """Get product by ID (served from the catalog cache when possible)"""
+        payload = await product_service.get_payload_by_id(product_id)
+        if payload is None:
+            raise NotFoundException(detail=f"Product with ID {product_id} not found")
+        return Response(content=payload, media_type=MediaType.JSON)
+
+    @get("/search")
+    async def search_products(
+        self,
+        product_service: ProductService,
+        q: str = Parameter(
+            min_length=1, max_length=200, description="Words to search for"
+        ),
+        count: int = Parameter(
+            gt=0, le=100, default=20, description="Number of records"
+        ),
+        after: Optional[str] = Parameter(
+            default=None, description="Cursor: return results after this position"
+        ),
+    ) -> Response[List[ProductResponse]]:
+        """Full-text search over product name and description
+
+        Best matches come first (a name match outranks a description match).
+        The cursor for the next page is returned in X-Next-Cursor.
+        """
+        try:
+            page = await product_service.search(q, count=count, after=after)
+        except ValueError as e:
+            raise ValidationException(detail=str(e))
+        headers = {}
+        if page.next_cursor:
+            headers["X-Next-Cursor"] = page.next_cursor
+        return Response(
+            content=bytes(page.body), media_type=MediaType.JSON, headers=headers
+        )
+
+    @get()
+    async def get_products(
+        self,
+        product_service: ProductService,
+        sort: ProductSort = Parameter(
+            default=ProductSort.NAME, description="Sort by name or price"
+        ),
+        count: int = Parameter(
+            gt=0, le=100, default=20, description="Number of records"
+        ),
+        after: Optional[str] = Parameter(
+            default=None, description="Cursor: return products after this position"
+        ),
+        before: Optional[str] = Parameter(
+            default=None, description="Cursor: return products before this position"
+        ),
+        ids: Optional[List[int]] = Parameter(
+            default=None, max_items=MAX_FILTER_IDS, description="Product IDs"
+        ),
+    ) -> Response[List[ProductResponse]]:
+        """List the catalog with cursor pagination, or multi-get by `ids`
+
+        Cursors for the next/previous page are returned in the
+        X-Next-Cursor/X-Prev-Cursor headers. With `ids`, products come back in
+        the requested order and unknown IDs are listed in X-Missing-Ids.
+        """
+        headers = {}
+        if ids is not None:
+            if after is not None or before is not None:
+                raise ValidationException(detail="ids cannot be combined with cursors")
+            payloads, missing = await product_service.get_many(ids)
+            if missing:
+                headers["X-Missing-Ids"] = ",".join(map(str, missing))
+            return Response(
+                content=b"[" + b",".join(payloads) + b"]",
+                media_type=MediaType.JSON,
+                headers=headers,
+            )
+
+        try:
+            page = await product_service.get_page(
+                sort=sort, count=count, after=after, before=before
+            )
+        except ValueError as e:
+            raise ValidationException(detail=str(e))
+        if page.next_cursor:
+            headers["X-Next-Cursor"] = page.next_cursor
+        if page.prev_cursor:
+            headers["X-Prev-Cursor"] = page.prev_cursor
+        return Response(
+            content=bytes(page.body), media_type=MediaType.JSON, headers=headers
+        )
+
+    @post()
+    async def create_product(
+        self,
+        product_service: ProductService,
+        data: ProductCreate,
+    ) -> ProductResponse:
+        """Create new product"""
+        product = await product_service.create(data)
+        return ProductResponse.model_validate(product)
+
+    @patch("/{product_id:int}")
+    async def update_product(
+        self,
+        product_service: ProductService,
+        product_id: int,
+        data: ProductUpdate,
+    ) -> ProductResponse:
+        """Update product (partial update)"""
+        product = await product_service.update(product_id, data)
+        if not product:
+            raise NotFoundException(detail=f"Product with ID {product_id} not found")
+        return ProductResponse.model_validate(product)
@@ -1,40 +1,355 @@
+from datetime import datetime
 from typing import List, Optional
 
-from app.schemas import UserCreate, UserResponse, UserUpdate
-from app.services.user_service import UserService
-from litestar import Controller, delete, get, patch, post
+from litestar import (
+    Controller,
+    MediaType,
+    Request,
+    Response,
+    delete,
+    get,
+    patch,
+    post,
+)
+from litestar.di import Provide
 from litestar.exceptions import NotFoundException, ValidationException
 from litestar.params import Parameter
-from litestar.status_codes import HTTP_200_OK
+from litestar.response import Stream
+from litestar.status_codes import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.cache import CacheBackend
+from app.database import LazySession
+from app.etags import etag_matches, make_etag, parse_etag
+from app.exceptions import PreconditionFailedException
+from app.pagination import encode_cursor
+from app.replicas import ReplicaSet, prefers_primary
+from app.repositories.loading import LoadProfile
+from app.repositories.user_repository import UserRepository
+from app.schemas import (
+    MAX_FILTER_IDS,
+    OrderInclude,
+    OrderWithProductsResponse,
+    UserBulkCreateResponse,
+    UserCreate,
+    UserDetailResponse,
+    UserFilter,
+    UserResponse,
+    UserUpdate,
+)
+from app.serializers import UserStruct, decode_version, encode_rows, struct_fields
+from app.services.order_service import OrderService
+from app.services.user_export import EXPORT_MEDIA_TYPES, ExportFormat, export_users
+from app.services.user_service import UserService
+
+BULK_MAX_ITEMS = 10_000
+
+# Какие связи нужны для каждой схемы ответа: грузим ровно то, что сериализуем
+RESPONSE_PROFILES = {
+    UserResponse: LoadProfile.SCALAR,
+    UserDetailResponse: LoadProfile.SUMMARY,
+}
+
+# Колонки списка пользователей: строки кодируются в JSON напрямую через msgspec
+USER_LIST_COLUMNS = struct_fields(UserStruct)
+
+
+def user_etag(user_id: int, version: int) -> str:
+    return make_etag(user_id, version)
+
+
+def version_from_if_match(if_match: str, user_id: int) -> Optional[int]:
+    """Ожидаемая версия из If-Match; None для "*" (любая существующая версия)
+
+    If-Match использует сильное сравнение: слабые и чужие теги не совпадают
+    ни с какой версией, поэтому сразу 412.
+    """
+    if if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        parts = parse_etag(tag)
+        if (
+            parts
+            and len(parts) == 2
+            and parts[0] == str(user_id)
+            and parts[1].isdigit()
+        ):
+            versions.add(int(parts[1]))
+    if not versions:
+        raise PreconditionFailedException(
+            detail=f"If-Match does not match any version of user {user_id}"
+        )
+    if len(versions) > 1:
+        raise ValidationException(detail="If-Match must name a single version")
+    return versions.pop()
+
+
+async def provide_user_filter(
+    email: Optional[str] = Parameter(default=None, description="Exact email"),
+    name_prefix: Optional[str] = Parameter(
+        default=None,
+        min_length=1,
+        max_length=100,
+        description="Case-insensitive name prefix",
+    ),
+    created_after: Optional[datetime] = Parameter(
+        default=None, description="Created at or after (ISO 8601)"
+    ),
+    created_before: Optional[datetime] = Parameter(
+        default=None, description="Created before (ISO 8601)"
+    ),
+    ids: Optional[List[int]] = Parameter(
+        default=None, max_items=MAX_FILTER_IDS, description="User IDs"
+    ),
+) -> UserFilter:
+    """Whitelisted list filters, shared by listing and export"""
+    user_filter = UserFilter(
+        email=email,
+        name_prefix=name_prefix,
+        created_after=created_after,
+        created_before=created_before,
+        ids=ids,
+    )
+    if (
+        user_filter.created_after is not None
+        and user_filter.created_before is not None
+        and user_filter.created_after >= user_filter.created_before
+    ):
+        raise ValidationException(
+            detail="created_after must be earlier than created_before"
+        )
+    return user_filter
+
+
+async def provide_read_user_service(
+    request: Request,
+    read_db_session: LazySession,
+    user_cache: CacheBackend,
+    replica_set: ReplicaSet,
+) -> UserService:
+    """User service for read-only handlers, backed by a read replica
+
+    Replica reads only look up the user cache and never fill it: a lagging
+    replica would put the previous version back right after a write
+    invalidated it, and the entry would outlive the writer's sticky window.
+    Reads from the primary (no replicas, or a client pinned after a write)
+    fill the cache as usual.
+    """
+    from_replica = replica_set.enabled and not prefers_primary(request)
+    return UserService(
+        UserRepository(read_db_session), cache=user_cache, fill_cache=not from_replica
+    )
+
+
+# Handlers that only read are served from replicas when they are configured
+READ_DEPENDENCIES = {"user_service": Provide(provide_read_user_service)}
 
 
 class UserController(Controller):
     path = "/users"
+    dependencies = {"user_filter": Provide(provide_user_filter)}
 
-    @get("/{user_id:int}")
+    @get("/{user_id:int}", dependencies=READ_DEPENDENCIES)
     async def get_user_by_id(
         self,
         user_service: UserService,
         user_id: int = Parameter(gt=0, description="User ID"),
-    ) -> UserResponse:
-        """Get user by ID"""
-        user = await user_service.get_by_id(user_id)
+        if_none_match: Optional[str] = Parameter(
+            header="If-None-Match", default=None, description="ETag from a previous GET"
+        ),
+    ) -> Response[UserResponse]:
+        """Get user by ID (served from the user cache when possible)
+
+        The response carries a strong ETag built from the row version. A
+        matching If-None-Match is answered with 304 after a version-only
+        lookup, without loading or serializing the user.
+        """
+        if if_none_match is not None:
+            version = await user_service.get_version(user_id)
+            if version is None:
+                raise NotFoundException(detail=f"User with ID {user_id} not found")
+            etag = user_etag(user_id, version)
+            if etag_matches(if_none_match, etag):
+                return Response(
+                    content=b"",
+                    status_code=HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag},
+                )
+
+        payload = await user_service.get_payload_by_id(user_id)
+        if payload is None:
+            raise NotFoundException(detail=f"User with ID {user_id} not found")
+        return Response(
+            content=payload,
+            media_type=MediaType.JSON,
+            headers={"ETag": user_etag(user_id, decode_version(payload))},
+        )
+
+    @get("/{user_id:int}/details")
+    async def get_user_details(
+        self,
+        user_service: UserService,
+        user_id: int = Parameter(gt=0, description="User ID"),
+    ) -> UserDetailResponse:
+        """Get user by ID with addresses and orders"""
+        user = await user_service.get_by_id(
+            user_id, profile=RESPONSE_PROFILES[UserDetailResponse]
+        )
         if not user:
             raise NotFoundException(detail=f"User with ID {user_id} not found")
-        return UserResponse.model_validate(user)
+        return UserDetailResponse.model_validate(user)
+
+    @get("/{user_id:int}/orders")
+    async def get_user_orders(
+        self,
+        user_service: UserService,
+        order_service: OrderService,
+        user_id: int = Parameter(gt=0, description="User ID"),
+        count: int = Parameter(
+            gt=0, le=100, default=20, description="Number of records"
+        ),
+        after: Optional[str] = Parameter(
+            default=None, description="Cursor: return orders after this position"
+        ),
+        before: Optional[str] = Parameter(
+            default=None, description="Cursor: return orders before this position"
+        ),
+        include: Optional[OrderInclude] = Parameter(
+            default=None, description="Also return order lines with products"
+        ),
+    ) -> Response[List[OrderWithProductsResponse]]:
+        """Get user's orders, newest first, with cursor pagination
+
+        Products are loaded (in one query for the whole page) only with
+        include=products. Cursors are returned in the
+        X-Next-Cursor/X-Prev-Cursor headers.
+        """
+        try:
+            page = await order_service.get_user_page(
+                user_id,
+                count=count,
+                after=after,
+                before=before,
+                include_products=include == OrderInclude.PRODUCTS,
+            )
+        except ValueError as e:
+            raise ValidationException(detail=str(e))
+
+        # Empty first page: tell a missing user from a user without orders
+        if (
+            page.item_count == 0
+            and after is None
+            and before is None
+            and await user_service.get_version(user_id) is None
+        ):
+            raise NotFoundException(detail=f"User with ID {user_id} not found")
+
+        headers = {}
+        if page.next_cursor:
+            headers["X-Next-Cursor"] = page.next_cursor
+        if page.prev_cursor:
+            headers["X-Prev-Cursor"] = page.prev_cursor
+        return Response(
+            content=bytes(page.body), media_type=MediaType.JSON, headers=headers
+        )
 
-    @get()
+    @get(dependencies=READ_DEPENDENCIES)
     async def get_all_users(
         self,
         user_service: UserService,
+        user_filter: UserFilter,
         count: int = Parameter(
             gt=0, le=100, default=10, description="Number of records"
         ),
         page: int = Parameter(gt=0, default=1, description="Page number"),
-    ) -> List[UserResponse]:
-        """Get list of users with pagination"""
-        users = await user_service.get_by_filter(count=count, page=page)
-        return [UserResponse.model_validate(user) for user in users]
+        after: Optional[str] = Parameter(
+            default=None, description="Cursor: return users after this position"
+        ),
+        before: Optional[str] = Parameter(
+            default=None, description="Cursor: return users before this position"
+        ),
+    ) -> Response[List[UserResponse]]:
+        """Get list of users with filters and offset or cursor pagination
+
+        Cursor for the next/previous page is returned in the
+        X-Next-Cursor/X-Prev-Cursor headers. With `ids` this is a multi-get
+        instead: users come back in the requested order and unknown IDs are
+        listed in the X-Missing-Ids header.
+        """
+        filters = user_filter.model_dump(exclude_none=True)
+        if user_filter.ids is not None:
+            if len(filters) > 1 or after is not None or before is not None:
+                raise ValidationException(
+                    detail="ids cannot be combined with other filters or cursors"
+                )
+            payloads, missing = await user_service.get_many(user_filter.ids)
+            headers = {}
+            if missing:
+                headers["X-Missing-Ids"] = ",".join(map(str, missing))
+            return Response(
+                content=b"[" + b",".join(payloads) + b"]",
+                media_type=MediaType.JSON,
+                headers=headers,
+            )
+
+        headers = {}
+        if after is not None or before is not None:
+            try:
+                result = await user_service.get_page(
+                    count=count,
+                    after=after,
+                    before=before,
+                    columns=USER_LIST_COLUMNS,
+                    **filters,
+                )
+            except ValueError as e:
+                raise ValidationException(detail=str(e))
+            users = result.items
+            if result.next_cursor:
+                headers["X-Next-Cursor"] = result.next_cursor
+            if result.prev_cursor:
+                headers["X-Prev-Cursor"] = result.prev_cursor
+        else:
+            users = await user_service.get_by_filter(
+                count=count,
+                page=page,
+                columns=USER_LIST_COLUMNS,
+                **filters,
+            )
+            # Позволяет перейти с offset-режима на курсоры с любой страницы
+            if len(users) == count:
+                headers["X-Next-Cursor"] = encode_cursor([users[-1].id])
+
+        return Response(
+            content=encode_rows(UserStruct, users),
+            media_type=MediaType.JSON,
+            headers=headers,
+        )
+
+    @get("/export")
+    async def export_all_users(
+        self,
+        session_factory: async_sessionmaker,
+        user_filter: UserFilter,
+        export_format: ExportFormat = Parameter(
+            query="format", default=ExportFormat.NDJSON, description="ndjson or csv"
+        ),
+    ) -> Stream:
+        """Stream all (optionally filtered) users as NDJSON or CSV"""
+        return Stream(
+            export_users(
+                session_factory,
+                export_format,
+                **user_filter.model_dump(exclude_none=True),
+            ),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="users.{export_format.value}"'
+                )
+            },
+        )
 
     @post()
     async def create_user(
@@ -53,6 +368,30 @@ class UserController(Controller):
                 )
             raise
 
+    @post("/bulk")
+    async def bulk_create_users(
+        self,
+        user_service: UserService,
+        data: List[UserCreate],
+    ) -> UserBulkCreateResponse:
+        """Create many users in one transaction
+
+        Items whose email is already taken (or repeated in the request) are
+        reported in `conflicts` instead of failing the whole batch.
+        """
+        if not data:
+            raise ValidationException(detail="At least one user is required")
+        if len(data) > BULK_MAX_ITEMS:
+            raise ValidationException(
+                detail=f"At most {BULK_MAX_ITEMS} users per request are allowed"
+            )
+
+        created, conflicts = await user_service.bulk_create(data)
+        return UserBulkCreateResponse(
+            created=[UserResponse.model_validate(user) for user in created],
+            conflicts=conflicts,
+        )
+
     @delete("/{user_id:int}", status_code=HTTP_200_OK)  # Явно указываем статус код 200
     async def delete_user(
         self,
@@ -71,9 +410,35 @@ class UserController(Controller):
         user_service: UserService,
         user_id: int,  # Без Parameter() - получается из пути
         data: UserUpdate,  # Из тела запроса
-    ) -> UserResponse:
-        """Update user (partial update)"""
-        user = await user_service.update(user_id, data)
+        if_match: Optional[str] = Parameter(
+            header="If-Match", default=None, description="ETag of the edited version"
+        ),
+    ) -> Response[UserResponse]:
+        """Update user (partial update)
+
+        Optimistic concurrency: with If-Match (or a `version` field in the
+        body) the update applies only if the row is still at that version,
+        otherwise 412. The new ETag is returned in the response.
+        """
+        expected_version = None
+        if if_match is not None:
+            expected_version = version_from_if_match(if_match, user_id)
+            if data.version is not None and data.version != expected_version:
+                raise ValidationException(
+                    detail="If-Match and version in the body disagree"
+                )
+
+        user = await user_service.update(
+            user_id, data, expected_version=expected_version
+        )
         if not user:
+            # RFC 9110 13.1.1: "*" требует текущего представления ресурса
+            if if_match is not None and if_match.strip() == "*":
+                raise PreconditionFailedException(
+                    detail=f"User with ID {user_id} does not exist"
+                )
             raise NotFoundException(detail=f"User with ID {user_id} not found")
-        return UserResponse.model_validate(user)
+        return Response(
+            content=UserResponse.model_validate(user),
+            headers={"ETag": user_etag(user.id, user.version)},
+        )
@@ -0,0 +1,153 @@
+import os
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.metrics import REGISTRY, Counter, Gauge, Histogram
+
+# Время ожидания соединения из пула (включая установку нового соединения)
+POOL_WAIT_SECONDS = REGISTRY.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a connection from the pool",
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+    )
+)
+POOL_TIMEOUTS = REGISTRY.register(
+    Counter("db_pool_checkout_timeouts_total", "Pool checkouts that timed out")
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, измеряющий время ожидания выдачи соединения"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_options_from_env(database_url: str) -> dict:
+    """Параметры пула соединений из переменных окружения
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (сек), DB_POOL_RECYCLE
+    (сек, -1 - не пересоздавать) и DB_POOL_PRE_PING. SQLite в памяти
+    работает на одном соединении (StaticPool), размер пула к нему не
+    применяется.
+    """
+    options = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", False),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    }
+
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    )
+    return options
+
+
+def register_pool_metrics(engine: AsyncEngine) -> None:
+    """Живые показатели пула в /metrics (вычисляются при каждом сборе)"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return
+
+    gauges = {
+        "db_pool_size": ("Configured pool size", pool.size),
+        "db_pool_checked_out": ("Connections currently in use", pool.checkedout),
+        "db_pool_checked_in": ("Idle connections in the pool", pool.checkedin),
+        "db_pool_overflow": (
+            "Connections open beyond pool_size",
+            lambda: max(0, pool.overflow()),
+        ),
+    }
+    for name, (documentation, function) in gauges.items():
+        REGISTRY.unregister(name)
+        gauge = REGISTRY.register(Gauge(name, documentation))
+        gauge.set_function(function)
+
+
+def enable_sqlite_foreign_keys(engine: AsyncEngine) -> None:
+    """Включить проверку внешних ключей в SQLite (по умолчанию выключена)
+
+    Без этого ON DELETE CASCADE, на который полагается удаление
+    пользователя, в SQLite не срабатывает.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class LazySession:
+    """Сессия запроса, создаваемая при первом обращении
+
+    Провайдер отдает обработчику этот объект вместо AsyncSession: пока
+    репозиторий ничего не выполнил (ответ из кэша, ошибка валидации),
+    сессия не создается. Соединение из пула AsyncSession берет сама - на
+    первом запросе, а вернуть его сразу после последнего чтения позволяет
+    release_connection.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession]):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    def in_transaction(self) -> bool:
+        return self._session is not None and self._session.in_transaction()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """Завершить читающую транзакцию и вернуть соединение в пул
+
+    Вызывается после последнего запроса на чтение, чтобы соединение не
+    удерживалось, пока ответ сериализуется и отправляется. COMMIT, а не
+    ROLLBACK: при expire_on_commit=False загруженные объекты остаются
+    доступными. Сессия с несохраненными изменениями не трогается.
+    """
+    if not session.in_transaction():
+        return
+    if session.new or session.dirty or session.deleted:
+        return
+    await session.commit()
@@ -0,0 +1,28 @@
+from typing import List, Optional
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из частей, например make_etag(user_id, version)"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match
+
+    Заголовок может содержать список тегов или "*". Для If-None-Match
+    используется слабое сравнение (RFC 9110, 13.1.2): префикс W/ не учитывается.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def parse_etag(tag: str) -> Optional[List[str]]:
+    """Части сильного ETag из make_etag; None для слабого или чужого тега"""
+    tag = tag.strip()
+    if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+        return None
+    return tag[1:-1].split("-")
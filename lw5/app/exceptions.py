@@ -24,3 +24,11 @@ class ConflictException(HTTPException):
             status_code=status_codes.HTTP_409_CONFLICT,
             detail=detail,
         )
+
+
+class PreconditionFailedException(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status_codes.HTTP_412_PRECONDITION_FAILED,
+            detail=detail,
+        )
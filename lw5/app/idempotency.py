@@ -0,0 +1,439 @@
+"""Идемпотентные повторы записи по заголовку Idempotency-Key
+
+Клиент, повторяющий запрос после таймаута или обрыва, передает тот же
+ключ. Первый запрос захватывает ключ в хранилище и выполняется как
+обычно, его ответ (статус, заголовки, тело) сохраняется на
+IDEMPOTENCY_TTL_SECONDS. Повтор получает сохраненный ответ с заголовком
+Idempotent-Replayed, не доходя до обработчиков, сервисов и репозиториев.
+
+- тот же ключ с другим методом, путем или телом - 422;
+- повтор, пока первый запрос еще выполняется - 409;
+- ответы 5xx не сохраняются: ключ освобождается, и повтор выполнит
+  запрос заново.
+
+Хранилище подключаемое: таблица idempotency_keys, общая для всех
+воркеров (по умолчанию), или память процесса (IDEMPOTENCY_STORE=memory).
+Просроченные записи удаляет purge_expired, приложение вызывает ее раз в
+IDEMPOTENCY_PURGE_SECONDS.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import msgspec
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.metrics import REGISTRY, Counter
+from app.models import IdempotencyKey
+from app.replicas import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_REPLAYS = REGISTRY.register(
+    Counter(
+        "idempotency_replays_total",
+        "Write requests answered with a stored response",
+    )
+)
+
+
+@dataclass
+class IdempotencyRecord:
+    fingerprint: str
+    # None - первый запрос с этим ключом еще выполняется
+    status_code: Optional[int] = None
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+def _pack(record: IdempotencyRecord) -> bytes:
+    return msgspec.msgpack.encode([record.headers, record.body])
+
+
+def _unpack(
+    fingerprint: str, status_code: Optional[int], response
+) -> IdempotencyRecord:
+    if status_code is None or response is None:
+        return IdempotencyRecord(fingerprint)
+    headers, body = msgspec.msgpack.decode(response)
+    return IdempotencyRecord(
+        fingerprint,
+        status_code,
+        [(name, value) for name, value in headers],
+        body,
+    )
+
+
+class IdempotencyStore(ABC):
+    """Хранилище ключей идемпотентности
+
+    claim атомарно захватывает ключ: None - ключ был свободен (или
+    просрочен) и теперь принадлежит вызывающему, иначе - существующая
+    запись. Захваченный ключ блокируется на lock_seconds: если воркер
+    упал, не сохранив ответ, ключ освободится сам.
+    """
+
+    @abstractmethod
+    async def claim(
+        self, key: str, fingerprint: str
+    ) -> Optional[IdempotencyRecord]: ...
+
+    @abstractmethod
+    async def save(self, key: str, record: IdempotencyRecord) -> None: ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Освободить захваченный ключ без ответа (ошибка обработки)"""
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        """Удалить просроченные записи, вернуть их число"""
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Ключи в памяти процесса - для одного воркера, разработки и тестов"""
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        lock_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._clock = clock
+        self._data: Dict[str, Tuple[float, IdempotencyRecord]] = {}
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        now = self._clock()
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        self._data[key] = (now + self.lock_seconds, IdempotencyRecord(fingerprint))
+        return None
+
+    async def save(self, key: str, record: IdempotencyRecord) -> None:
+        self._data[key] = (self._clock() + self.ttl, record)
+
+    async def release(self, key: str) -> None:
+        entry = self._data.get(key)
+        if entry is not None and not entry[1].completed:
+            del self._data[key]
+
+    async def purge_expired(self) -> int:
+        now = self._clock()
+        expired = [
+            key for key, (expires_at, _) in self._data.items() if expires_at <= now
+        ]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+
+
+class SqlIdempotencyStore(IdempotencyStore):
+    """Ключи в таблице idempotency_keys - общие для всех воркеров
+
+    Захват - INSERT: из параллельных запросов с одним ключом его выполнит
+    только один, остальные упрутся в первичный ключ и прочитают запись.
+    Каждая операция - отдельная короткая транзакция, соединение не
+    удерживается, пока запрос обрабатывается.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ttl: float = 86400.0,
+        lock_seconds: float = 60.0,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._session_factory = session_factory
+        self._clock = clock
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        now = self._clock()
+        locked_until = now + timedelta(seconds=self.lock_seconds)
+        async with self._session_factory() as session:
+            try:
+                await session.execute(
+                    insert(IdempotencyKey).values(
+                        key=key, fingerprint=fingerprint, expires_at=locked_until
+                    )
+                )
+                await session.commit()
+                return None
+            except IntegrityError:
+                await session.rollback()
+
+            result = await session.execute(
+                select(
+                    IdempotencyKey.fingerprint,
+                    IdempotencyKey.status_code,
+                    IdempotencyKey.response,
+                    IdempotencyKey.expires_at,
+                ).where(IdempotencyKey.key == key)
+            )
+            row = result.one_or_none()
+            if row is None:
+                # Запись удалена очисткой между INSERT и SELECT: пусть
+                # клиент повторит запрос
+                return IdempotencyRecord(fingerprint)
+            if row.expires_at > now:
+                return _unpack(row.fingerprint, row.status_code, row.response)
+
+            # Просроченная запись: захватываем, если другой запрос не успел
+            result = await session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at == row.expires_at,
+                )
+                .values(
+                    fingerprint=fingerprint,
+                    status_code=None,
+                    response=None,
+                    expires_at=locked_until,
+                )
+            )
+            await session.commit()
+            return None if result.rowcount == 1 else IdempotencyRecord(fingerprint)
+
+    async def save(self, key: str, record: IdempotencyRecord) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.fingerprint == record.fingerprint,
+                )
+                .values(
+                    status_code=record.status_code,
+                    response=_pack(record),
+                    expires_at=self._clock() + timedelta(seconds=self.ttl),
+                )
+            )
+            await session.commit()
+
+    async def release(self, key: str) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+                )
+            )
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at <= self._clock())
+            )
+            await session.commit()
+            return result.rowcount
+
+
+def idempotency_store_from_env(session_factory: async_sessionmaker) -> IdempotencyStore:
+    """IDEMPOTENCY_STORE (sql или memory) и IDEMPOTENCY_TTL_SECONDS"""
+    kind = os.getenv("IDEMPOTENCY_STORE", "sql").strip().lower()
+    ttl = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    if kind == "memory":
+        return MemoryIdempotencyStore(ttl=ttl)
+    if kind == "sql":
+        return SqlIdempotencyStore(session_factory, ttl=ttl)
+    raise ValueError(f"IDEMPOTENCY_STORE must be sql or memory, got {kind!r}")
+
+
+async def purge_periodically(store: IdempotencyStore, interval: float) -> None:
+    """Удалять просроченные ключи раз в interval секунд (фоновая задача)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await store.purge_expired()
+        except Exception:
+            logger.exception("Idempotency key cleanup failed")
+            continue
+        if removed:
+            logger.info("Purged %d expired idempotency keys", removed)
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        scope["method"].encode(),
+        scope["path"].encode(),
+        scope["query_string"],
+    ):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _body_limit(scope: Scope) -> Optional[int]:
+    """request_max_body_size обработчика (None - без ограничения)"""
+    return scope["route_handler"].resolve_request_max_body_size()
+
+
+async def _read_body(
+    receive: Receive, headers: Dict[bytes, bytes], limit: Optional[int]
+) -> Optional[bytes]:
+    """Тело запроса целиком; None - тело больше limit байт
+
+    Слишком большое тело по Content-Length отклоняется без чтения, без
+    заголовка (chunked) - как только прочитанное превысит limit.
+    """
+    content_length = headers.get(b"content-length", b"")
+    if limit is not None and content_length.isdigit():
+        if int(content_length) > limit:
+            return None
+
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """receive, отдающий уже прочитанное тело, затем - исходный"""
+    sent = False
+
+    async def wrapper() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return wrapper
+
+
+async def _send_response(
+    send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes
+) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_error(send: Send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    await _send_response(send, status, headers, body)
+
+
+def idempotency_middleware(store: IdempotencyStore) -> Callable[[ASGIApp], ASGIApp]:
+    """ASGI middleware: повтор записи с тем же Idempotency-Key получает
+    сохраненный ответ
+
+    Действует только на небезопасные методы с заголовком Idempotency-Key;
+    остальные запросы проходят без изменений.
+    """
+
+    def factory(app: ASGIApp) -> ASGIApp:
+        async def middleware(scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+                await app(scope, receive, send)
+                return
+            headers = dict(scope["headers"])
+            raw_key = headers.get(IDEMPOTENCY_HEADER)
+            if raw_key is None:
+                await app(scope, receive, send)
+                return
+
+            key = raw_key.decode("latin-1").strip()
+            if not key or len(key) > MAX_KEY_LENGTH:
+                await _send_error(
+                    send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+                )
+                return
+
+            # Тело читается до обработчика, поэтому лимит Litestar на его
+            # размер проверяется здесь
+            limit = _body_limit(scope)
+            body = await _read_body(receive, headers, limit)
+            if body is None:
+                await _send_error(send, 413, f"Request body exceeds {limit} bytes")
+                return
+            fingerprint = _fingerprint(scope, body)
+            stored = await store.claim(key, fingerprint)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    await _send_error(
+                        send,
+                        422,
+                        "Idempotency-Key has already been used for a different request",
+                    )
+                elif not stored.completed:
+                    await _send_error(
+                        send,
+                        409,
+                        "A request with this Idempotency-Key is still in progress",
+                    )
+                else:
+                    IDEMPOTENCY_REPLAYS.inc()
+                    await _send_response(
+                        send,
+                        stored.status_code,
+                        [*stored.headers, (REPLAYED_HEADER, b"true")],
+                        stored.body,
+                    )
+                return
+
+            response = IdempotencyRecord(fingerprint)
+            chunks: List[bytes] = []
+            finished = False
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal finished
+                if message["type"] == "http.response.start":
+                    response.status_code = message["status"]
+                    response.headers = list(message.get("headers", []))
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+                    finished = not message.get("more_body", False)
+                await send(message)
+
+            try:
+                await app(scope, _replay_body(body, receive), send_wrapper)
+            finally:
+                if finished and response.status_code < 500:
+                    response.body = b"".join(chunks)
+                    await store.save(key, response)
+                else:
+                    await store.release(key)
+
+        return middleware
+
+    return factory
@@ -0,0 +1,117 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from litestar.exceptions import HTTPException
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.metrics import REGISTRY, Counter, Gauge, Histogram
+
+REQUEST_LABELS = ("method", "route")
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route and status code",
+        labelnames=REQUEST_LABELS + ("status",),
+    )
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency, until the last body chunk is sent",
+        labelnames=REQUEST_LABELS,
+    )
+)
+HTTP_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "HTTP requests being processed")
+)
+HTTP_RESPONSE_SIZE = REGISTRY.register(
+    Histogram(
+        "http_response_size_bytes",
+        "HTTP response body size",
+        labelnames=REQUEST_LABELS,
+        buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+    )
+)
+HTTP_DB_TIME = REGISTRY.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Time spent executing SQL statements per HTTP request",
+        labelnames=REQUEST_LABELS,
+    )
+)
+HTTP_DB_STATEMENTS = REGISTRY.register(
+    Histogram(
+        "http_request_db_statements",
+        "SQL statements executed per HTTP request",
+        labelnames=REQUEST_LABELS,
+        buckets=(0, 1, 2, 3, 5, 10, 25, 50),
+    )
+)
+
+# Накопитель времени SQL текущего запроса: [секунды, число запросов].
+# События движка выполняются в том же контексте, что и обработчик.
+_db_time: ContextVar[Optional[List[float]]] = ContextVar("db_time", default=None)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Учитывать время выполнения SQL в метриках текущего HTTP-запроса"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        accumulator = _db_time.get()
+        if accumulator is not None:
+            accumulator[0] += time.perf_counter() - context._metrics_started
+            accumulator[1] += 1
+
+
+def metrics_middleware(app: ASGIApp) -> ASGIApp:
+    """ASGI middleware: латентность, размер ответа, статус и время SQL по маршрутам
+
+    Маршрут берется из шаблона пути (/users/{user_id}), чтобы число
+    рядов метрик не зависело от ID в URL.
+    """
+
+    async def middleware(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+
+        labels = (scope["method"], scope.get("path_template") or scope["path"])
+        state = {"status": 500, "size": 0}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+
+        accumulator = [0.0, 0]
+        token = _db_time.set(accumulator)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await app(scope, receive, send_wrapper)
+        except HTTPException as exc:
+            state["status"] = exc.status_code
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _db_time.reset(token)
+            HTTP_REQUESTS.labels(*labels, str(state["status"])).inc()
+            HTTP_LATENCY.labels(*labels).observe(elapsed)
+            HTTP_RESPONSE_SIZE.labels(*labels).observe(state["size"])
+            HTTP_DB_TIME.labels(*labels).observe(accumulator[0])
+            HTTP_DB_STATEMENTS.labels(*labels).observe(accumulator[1])
+
+    return middleware
@@ -1,18 +1,43 @@
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
 
-from app.controllers.user_controller import UserController
-from app.models import Base
-from app.repositories.user_repository import UserRepository
-from app.services.user_service import UserService
 from dotenv import load_dotenv
 from litestar import Litestar, Request, Response
 from litestar.di import Provide
 from litestar.exceptions import HTTPException
 from litestar.status_codes import HTTP_500_INTERNAL_SERVER_ERROR
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.cache import CacheBackend, LRUCache
+from app.controllers.admin_controller import AdminController
+from app.controllers.metrics_controller import MetricsController
+from app.controllers.order_controller import OrderController
+from app.controllers.product_controller import ProductController
+from app.controllers.user_controller import UserController
+from app.database import (
+    LazySession,
+    enable_sqlite_foreign_keys,
+    pool_options_from_env,
+    register_pool_metrics,
+)
+from app.idempotency import (
+    idempotency_middleware,
+    idempotency_store_from_env,
+    purge_periodically,
+)
+from app.instrumentation import instrument_engine, metrics_middleware
+from app.models import Base
+from app.replicas import ReplicaSet, sticky_primary_middleware
+from app.repositories.order_repository import OrderRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.user_repository import UserRepository
+from app.schema_check import check_schema, schema_startup_mode
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.services.user_service import UserService
+from app.slow_queries import SlowQueryLog
 
 # Настройка логирования
 logging.basicConfig(level=logging.WARNING)
@@ -24,42 +49,155 @@ load_dotenv()
 # Настройка базы данных
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Создаем асинхронный движок (параметры пула - из переменных DB_POOL_*)
+engine = create_async_engine(
+    DATABASE_URL, echo=False, **pool_options_from_env(DATABASE_URL)
+)
+enable_sqlite_foreign_keys(engine)
+register_pool_metrics(engine)
+instrument_engine(engine)
+# Журнал медленных запросов включается переменной SLOW_QUERY_THRESHOLD_MS
+slow_query_log = SlowQueryLog.from_env()
+slow_query_log.install(engine)
 async_session_factory = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
 )
 
+# Реплики для чтения (DATABASE_REPLICA_URLS); без них все читается с engine
+replica_set = ReplicaSet.from_env()
+for replica in replica_set.engines:
+    instrument_engine(replica)
+    slow_query_log.install(replica)
+
+# Кэш сериализованных ответов GET /users/{id}. Для общего кэша между
+# процессами оберните в TieredCache(LRUCache(...), shared=<бэкенд>)
+user_cache = LRUCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "30")),
+)
+
+# Кэш каталога товаров: чтения преобладают, любая запись очищает его целиком.
+# Другие процессы видят изменения не позже чем через CATALOG_CACHE_TTL
+catalog_cache = LRUCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "300")),
+)
+
+# Сохраненные ответы на запросы с Idempotency-Key (IDEMPOTENCY_STORE)
+idempotency_store = idempotency_store_from_env(async_session_factory)
+
 
 @asynccontextmanager
 async def lifespan(app: Litestar):
     """Контекст жизненного цикла приложения"""
-    # Создаем таблицы при запуске
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Схему применяет alembic upgrade head (entrypoint.sh); воркер только
+    # проверяет, что база на последней миграции, и падает, если нет
+    mode = schema_startup_mode()
+    if mode == "check":
+        await check_schema(engine)
+    elif mode == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    purge_task = asyncio.create_task(
+        purge_periodically(
+            idempotency_store, float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "600"))
+        )
+    )
 
     yield
 
+    purge_task.cancel()
+    await replica_set.dispose()
     await engine.dispose()
 
 
-async def provide_db_session() -> AsyncSession:
-    """Провайдер сессии базы данных - БЕЗ автоматического коммита"""
-    async with async_session_factory() as session:
-        try:
-            yield session
-        finally:
-            await session.close()  # Просто закрываем сессию, коммит делается в обработчиках
+async def provide_db_session() -> LazySession:
+    """Провайдер сессии базы данных - БЕЗ автоматического коммита
+
+    Сессия создается при первом обращении, соединение берется на первом
+    запросе (см. LazySession).
+    """
+    session = LazySession(async_session_factory)
+    try:
+        yield session
+    finally:
+        await session.close()  # Просто закрываем сессию, коммит делается в обработчиках
 
 
-async def provide_user_repository(db_session: AsyncSession) -> UserRepository:
+async def provide_read_db_session(request: Request) -> LazySession:
+    """Провайдер сессии для чтения: реплика, если клиент не закреплен за
+    основной БД после записи"""
+    # Реплика выбирается только если сессия действительно понадобится
+    session = LazySession(
+        lambda: replica_set.session_factory(request, async_session_factory)()
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def provide_replica_set() -> ReplicaSet:
+    """Провайдер набора реплик"""
+    return replica_set
+
+
+async def provide_session_factory() -> async_sessionmaker:
+    """Провайдер фабрики сессий - для обработчиков, которым сессия нужна
+    дольше запроса (потоковые ответы)"""
+    return async_session_factory
+
+
+async def provide_user_repository(db_session: LazySession) -> UserRepository:
     """Провайдер репозитория пользователей"""
     return UserRepository(db_session)
 
 
-async def provide_user_service(user_repository: UserRepository) -> UserService:
+async def provide_user_cache() -> CacheBackend:
+    """Провайдер кэша пользователей"""
+    return user_cache
+
+
+async def provide_product_repository(db_session: LazySession) -> ProductRepository:
+    """Провайдер репозитория товаров"""
+    return ProductRepository(db_session)
+
+
+async def provide_catalog_cache() -> LRUCache:
+    """Провайдер кэша каталога товаров"""
+    return catalog_cache
+
+
+async def provide_product_service(
+    product_repository: ProductRepository, catalog_cache: LRUCache
+) -> ProductService:
+    """Провайдер сервиса товаров"""
+    return ProductService(product_repository, cache=catalog_cache)
+
+
+async def provide_order_repository(db_session: LazySession) -> OrderRepository:
+    """Провайдер репозитория заказов"""
+    return OrderRepository(db_session)
+
+
+async def provide_order_service(
+    order_repository: OrderRepository, catalog_cache: LRUCache
+) -> OrderService:
+    """Провайдер сервиса заказов"""
+    return OrderService(order_repository, catalog_cache=catalog_cache)
+
+
+async def provide_slow_query_log() -> SlowQueryLog:
+    """Провайдер журнала медленных запросов"""
+    return slow_query_log
+
+
+async def provide_user_service(
+    user_repository: UserRepository, user_cache: CacheBackend
+) -> UserService:
     """Провайдер сервиса пользователей"""
-    return UserService(user_repository)
+    return UserService(user_repository, cache=user_cache)
 
 
 def handle_exception(request: Request, exc: Exception) -> Response:
@@ -83,12 +221,33 @@ def handle_exception(request: Request, exc: Exception) -> Response:
 
 
 app = Litestar(
-    route_handlers=[UserController],
+    route_handlers=[
+        UserController,
+        ProductController,
+        OrderController,
+        AdminController,
+        MetricsController,
+    ],
     dependencies={
         "db_session": Provide(provide_db_session),
+        "read_db_session": Provide(provide_read_db_session),
+        "replica_set": Provide(provide_replica_set),
+        "session_factory": Provide(provide_session_factory),
         "user_repository": Provide(provide_user_repository),
+        "user_cache": Provide(provide_user_cache),
         "user_service": Provide(provide_user_service),
+        "product_repository": Provide(provide_product_repository),
+        "catalog_cache": Provide(provide_catalog_cache),
+        "product_service": Provide(provide_product_service),
+        "order_repository": Provide(provide_order_repository),
+        "order_service": Provide(provide_order_service),
+        "slow_query_log": Provide(provide_slow_query_log),
     },
+    middleware=[
+        metrics_middleware,
+        sticky_primary_middleware(replica_set),
+        idempotency_middleware(idempotency_store),
+    ],
     lifespan=[lifespan],
     exception_handlers={
         Exception: handle_exception,
@@ -1,8 +1,20 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import (Column, DateTime, Float, ForeignKey, Integer, String,
-                        Table)
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Table,
+    event,
+    func,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -24,27 +36,46 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     description = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Версия строки: увеличивается при каждом изменении, из нее строится ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
+    # Связи не загружаются по умолчанию: нужный набор задается профилем
+    # загрузки в репозитории (см. app/repositories/loading.py)
     addresses = relationship(
-        "Address", back_populates="user", cascade="all, delete-orphan", lazy="selectin"
+        "Address",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # дочерние адреса удаляет БД (ON DELETE CASCADE)
+        lazy="raise_on_sql",
     )
-    orders = relationship("Order", back_populates="user", lazy="selectin")
+    orders = relationship("Order", back_populates="user", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"User(id={self.id}, name='{self.name}', email='{self.email}')"
 
 
+# Поиск по префиксу имени без учета регистра (фильтр name_prefix)
+Index(
+    "ix_users_lower_name",
+    func.lower(User.name).label("lower_name"),
+    postgresql_ops={"lower_name": "text_pattern_ops"},
+)
+
+
 class Address(Base):
     __tablename__ = "addresses"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
     street = Column(String, nullable=False)
     city = Column(String, nullable=False)
     postal_code = Column(String, nullable=False)
 
-    user = relationship("User", back_populates="addresses")
+    user = relationship("User", back_populates="addresses", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"Address(id={self.id}, street='{self.street}', city='{self.city}')"
@@ -61,13 +92,87 @@ class Product(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     orders = relationship(
-        "Order", secondary=order_product, back_populates="products", lazy="selectin"
+        "Order",
+        secondary=order_product,
+        back_populates="products",
+        lazy="raise_on_sql",
+    )
+
+    # Keyset-пагинация каталога: ORDER BY <колонка>, id без сортировки в памяти
+    __table_args__ = (
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price", "id"),
     )
 
     def __repr__(self):
         return f"Product(id={self.id}, name='{self.name}', price={self.price})"
 
 
+# Полнотекстовый поиск по товарам (GET /products/search). В модели поиска
+# нет: на PostgreSQL это генерируемая колонка tsvector с GIN-индексом, на
+# SQLite - FTS5-таблица, которую синхронизируют триггеры. Объекты создаются
+# здесь при create_all и миграцией для существующих баз
+PRODUCT_SEARCH_CONFIG = "russian"
+PRODUCT_SEARCH_DDL = {
+    "postgresql": [
+        f"""
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{PRODUCT_SEARCH_CONFIG}', coalesce(name, '')), 'A')
+            || setweight(
+                to_tsvector('{PRODUCT_SEARCH_CONFIG}', coalesce(description, '')), 'B'
+            )
+        ) STORED
+        """,
+        "CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE products_fts USING fts5(
+            name, description, content='products', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER products_fts_update
+            AFTER UPDATE OF name, description ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO products_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+    ],
+}
+# Таблицы и колонки поиска, которых нет в метаданных (для autogenerate)
+PRODUCT_SEARCH_OBJECTS = {"search_vector", "ix_products_search_vector", "products_fts"}
+
+for dialect, statements in PRODUCT_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(
+            Product.__table__,
+            "after_create",
+            DDL(statement).execute_if(dialect=dialect),
+        )
+# Триггеры SQLite удаляются вместе с products, FTS5-таблица - нет
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
+
+
 class Order(Base):
     __tablename__ = "orders"
 
@@ -78,11 +183,41 @@ class Order(Base):
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    user = relationship("User", back_populates="orders", lazy="selectin")
-    delivery_address = relationship("Address", lazy="selectin")
+    user = relationship("User", back_populates="orders", lazy="raise_on_sql")
+    delivery_address = relationship("Address", lazy="raise_on_sql")
     products = relationship(
-        "Product", secondary=order_product, back_populates="orders", lazy="selectin"
+        "Product",
+        secondary=order_product,
+        back_populates="orders",
+        lazy="raise_on_sql",
     )
 
     def __repr__(self):
         return f"Order(id={self.id}, total_amount={self.total_amount}, status='{self.status}')"
+
+
+# История заказов пользователя: WHERE user_id = ? ORDER BY created_at DESC, id
+Index(
+    "ix_orders_user_id_created_at_id",
+    Order.user_id,
+    Order.created_at.desc(),
+    Order.id,
+)
+
+
+class IdempotencyKey(Base):
+    """Ответ на запись с заголовком Idempotency-Key (app/idempotency.py)
+
+    Пока запрос выполняется, status_code и response пусты, а expires_at -
+    срок блокировки ключа; после ответа - срок хранения ответа.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    # sha256 метода, пути и тела запроса
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    # Заголовки и тело ответа (msgpack)
+    response = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,183 @@
+"""Чтение с реплик БД
+
+Реплики задаются переменной DATABASE_REPLICA_URLS (URL через запятую).
+Обработчики только для чтения получают сессию на реплике, выбранной по
+кругу среди здоровых. Реплика, на которой не удалось установить или
+сохранить соединение, исключается на REPLICA_EJECT_SECONDS, после чего
+снова получает запросы: первая же неудача исключит ее повторно.
+
+Реплики отстают от основной БД, поэтому после успешной записи клиенту
+выставляется cookie на REPLICA_STICKY_SECONDS: пока она есть, его чтения
+идут в основную БД и он видит собственные изменения.
+"""
+
+import itertools
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from litestar import Request
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.database import pool_options_from_env
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "read_primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReplicaSet:
+    """Реплики для чтения: round-robin по здоровым и исключение при ошибках"""
+
+    def __init__(
+        self,
+        engines: Optional[List[AsyncEngine]] = None,
+        eject_seconds: float = 30.0,
+        sticky_seconds: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.eject_seconds = eject_seconds
+        self.sticky_seconds = sticky_seconds
+        self.engines: List[AsyncEngine] = []
+        self._session_factories: Dict[AsyncEngine, async_sessionmaker] = {}
+        self._ejected_until: Dict[AsyncEngine, float] = {}
+        self._counter = itertools.count()
+        self._clock = clock
+        for engine in engines or []:
+            self.add(engine)
+
+    @classmethod
+    def from_env(cls) -> "ReplicaSet":
+        """DATABASE_REPLICA_URLS, REPLICA_EJECT_SECONDS, REPLICA_STICKY_SECONDS"""
+        urls = os.getenv("DATABASE_REPLICA_URLS", "")
+        engines = [
+            create_async_engine(url, echo=False, **pool_options_from_env(url))
+            for url in (url.strip() for url in urls.split(","))
+            if url
+        ]
+        return cls(
+            engines,
+            eject_seconds=float(os.getenv("REPLICA_EJECT_SECONDS", "30")),
+            sticky_seconds=int(os.getenv("REPLICA_STICKY_SECONDS", "5")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def add(self, engine: AsyncEngine) -> None:
+        """Добавить реплику и следить за ошибками соединения с ней"""
+        self.engines.append(engine)
+        self._session_factories[engine] = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+        )
+
+        @event.listens_for(engine.sync_engine, "handle_error")
+        def _handle_error(context):
+            # connection is None - соединение не удалось установить
+            if context.is_disconnect or context.connection is None:
+                self.eject(engine)
+
+    def remove(self, engine: AsyncEngine) -> None:
+        self.engines.remove(engine)
+        self._session_factories.pop(engine, None)
+        self._ejected_until.pop(engine, None)
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """Исключить реплику из выбора на eject_seconds"""
+        if engine not in self._session_factories:
+            return
+        self._ejected_until[engine] = self._clock() + self.eject_seconds
+        logger.warning(
+            "Read replica %s ejected for %.0f s",
+            engine.url.render_as_string(hide_password=True),
+            self.eject_seconds,
+        )
+
+    def is_healthy(self, engine: AsyncEngine) -> bool:
+        return self._ejected_until.get(engine, 0.0) <= self._clock()
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Следующая здоровая реплика по кругу; None - читать с основной БД"""
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._counter) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+    def session_factory(
+        self, request: Request, primary: async_sessionmaker
+    ) -> async_sessionmaker:
+        """Фабрика сессий для чтения в рамках запроса"""
+        if prefers_primary(request):
+            return primary
+        engine = self.choose()
+        return primary if engine is None else self._session_factories[engine]
+
+    def snapshot(self) -> List[dict]:
+        now = self._clock()
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": self.is_healthy(engine),
+                "ejected_for_seconds": round(
+                    max(0.0, self._ejected_until.get(engine, 0.0) - now), 1
+                ),
+            }
+            for engine in self.engines
+        ]
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+
+def prefers_primary(request: Request) -> bool:
+    """Клиент недавно писал и должен читать из основной БД"""
+    return STICKY_COOKIE in request.cookies
+
+
+def sticky_primary_middleware(replica_set: ReplicaSet) -> Callable[[ASGIApp], ASGIApp]:
+    """ASGI middleware: cookie read-your-writes после успешной записи
+
+    Ставится на ответы не-GET запросов со статусом < 400 и только когда
+    реплики настроены.
+    """
+
+    def factory(app: ASGIApp) -> ASGIApp:
+        async def middleware(scope: Scope, receive: Receive, send: Send) -> None:
+            if (
+                scope["type"] != "http"
+                or scope["method"] in SAFE_METHODS
+                or not replica_set.enabled
+            ):
+                await app(scope, receive, send)
+                return
+
+            cookie = (
+                f"{STICKY_COOKIE}=1; Max-Age={replica_set.sticky_seconds}; "
+                "Path=/; HttpOnly; SameSite=Lax"
+            )
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start" and message["status"] < 400:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"set-cookie", cookie.encode()),
+                    ]
+                await send(message)
+
+            await app(scope, receive, send_wrapper)
+
+        return middleware
+
+    return factory
@@ -0,0 +1,34 @@
+from enum import Enum
+from typing import Dict, Tuple
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models import Order, User
+
+
+class LoadProfile(str, Enum):
+    """Именованные профили загрузки связей пользователя"""
+
+    SCALAR = "scalar"  # только колонки users
+    SUMMARY = "summary"  # + адреса и заказы (без товаров)
+    FULL = "full"  # + товары и адрес доставки каждого заказа
+
+
+USER_LOAD_OPTIONS: Dict[LoadProfile, Tuple[LoaderOption, ...]] = {
+    LoadProfile.SCALAR: (),
+    LoadProfile.SUMMARY: (
+        selectinload(User.addresses),
+        selectinload(User.orders),
+    ),
+    LoadProfile.FULL: (
+        selectinload(User.addresses),
+        selectinload(User.orders).selectinload(Order.products),
+        selectinload(User.orders).selectinload(Order.delivery_address),
+    ),
+}
+
+
+def user_load_options(profile: LoadProfile) -> Tuple[LoaderOption, ...]:
+    """Опции загрузки связей User для профиля"""
+    return USER_LOAD_OPTIONS[LoadProfile(profile)]
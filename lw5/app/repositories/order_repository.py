@@ -0,0 +1,203 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, exists, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import release_connection
+from app.models import Address, Order, Product, order_product
+from app.pagination import Page, decode_cursor, encode_cursor
+from app.repositories.queries import id_in
+
+
+class OrderRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _select(columns: Optional[Sequence[str]] = None):
+        """SELECT заказов; с columns - только эти колонки, без ORM-объектов"""
+        if columns is not None:
+            return select(*(getattr(Order, column) for column in columns))
+        return select(Order)
+
+    @staticmethod
+    def _cursor_key(token: str) -> Tuple[datetime, int]:
+        values = decode_cursor(token)
+        try:
+            created_at = datetime.fromisoformat(values[0])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {token}") from e
+        if len(values) != 2 or not isinstance(values[1], int):
+            raise ValueError(f"Invalid cursor: {token}")
+        return created_at, values[1]
+
+    async def get_user_page(
+        self,
+        user_id: int,
+        count: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[Order]:
+        """Страница заказов пользователя, новые первыми (keyset по (created_at, id))
+
+        Порядок ORDER BY created_at DESC, id совпадает с индексом
+        ix_orders_user_id_created_at_id. Направления колонок разные, поэтому
+        вместо сравнения кортежей условие раскрыто:
+        created_at <= :c AND (created_at < :c OR id > :id) - первая часть
+        ограничивает диапазон сканирования индекса. Связь products не
+        загружается. С columns (должны включать id и created_at) элементы
+        страницы - строки Row.
+        """
+        if after is not None and before is not None:
+            raise ValueError("Only one of 'after' and 'before' can be given")
+
+        query = self._select(columns).where(Order.user_id == user_id)
+
+        if before is not None:
+            created_at, order_id = self._cursor_key(before)
+            query = query.where(
+                Order.created_at >= created_at,
+                or_(Order.created_at > created_at, Order.id < order_id),
+            )
+            query = query.order_by(Order.created_at, Order.id.desc())
+        else:
+            if after is not None:
+                created_at, order_id = self._cursor_key(after)
+                query = query.where(
+                    Order.created_at <= created_at,
+                    or_(Order.created_at < created_at, Order.id > order_id),
+                )
+            query = query.order_by(Order.created_at.desc(), Order.id)
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        result = await self.session.execute(query.limit(count + 1))
+        orders = list(result.all() if columns is not None else result.scalars().all())
+        has_more = len(orders) > count
+        orders = orders[:count]
+
+        def cursor(order) -> str:
+            return encode_cursor([order.created_at, order.id])
+
+        if before is not None:
+            orders.reverse()
+            page = Page(items=orders, next_cursor=before)
+            if has_more:
+                page.prev_cursor = cursor(orders[0])
+            return page
+
+        page = Page(items=orders)
+        if has_more:
+            page.next_cursor = cursor(orders[-1])
+        if after is not None and orders:
+            page.prev_cursor = cursor(orders[0])
+        return page
+
+    async def get_order_lines(
+        self, order_ids: Sequence[int], columns: Sequence[str]
+    ) -> list:
+        """Позиции заказов одним запросом: строки (order_id, quantity, *columns товара)"""
+        if not order_ids:
+            return []
+        result = await self.session.execute(
+            select(
+                order_product.c.order_id,
+                order_product.c.quantity,
+                *(getattr(Product, column) for column in columns),
+            )
+            .join(Product, Product.id == order_product.c.product_id)
+            .where(id_in(self.session, order_product.c.order_id, order_ids))
+            .order_by(order_product.c.order_id, Product.id)
+        )
+        return list(result.all())
+
+    async def get_products_for_order(
+        self, product_ids: Sequence[int], user_id: int, address_id: int
+    ) -> list:
+        """Товары заказа одним запросом: строки (id, price, stock_quantity, address_ok)
+
+        Принадлежность адреса пользователю проверяется скалярным подзапросом в
+        том же SELECT, без отдельного обращения к БД.
+        """
+        address_ok = exists().where(
+            Address.id == address_id, Address.user_id == user_id
+        )
+        result = await self.session.execute(
+            select(
+                Product.id,
+                Product.price,
+                Product.stock_quantity,
+                address_ok.label("address_ok"),
+            ).where(id_in(self.session, Product.id, product_ids))
+        )
+        return list(result.all())
+
+    async def reserve_stock(self, items: Dict[int, int]) -> List[int]:
+        """Списать остатки одним условным UPDATE, вернуть ID списанных товаров
+
+        UPDATE products SET stock_quantity = stock_quantity - <q>
+        WHERE id IN (...) AND stock_quantity >= <q>, где <q> - CASE по id.
+        Проверка и списание выполняются в БД атомарно для каждой строки,
+        поэтому конкурентные покупатели не уводят остаток в минус. Если
+        вернулось меньше строк, чем товаров в заказе, транзакцию нужно
+        откатить: часть товаров уже списана.
+        """
+        quantity = case(items, value=Product.id)
+        result = await self.session.execute(
+            update(Product)
+            .where(
+                id_in(self.session, Product.id, list(items)),
+                Product.stock_quantity >= quantity,
+            )
+            .values(stock_quantity=Product.stock_quantity - quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars().all())
+
+    async def create(
+        self, user_id: int, address_id: int, items: Dict[int, int]
+    ) -> Order:
+        """Создать заказ с позициями и зафиксировать транзакцию
+
+        total_amount считается в БД подзапросом SUM(price * quantity) по тем
+        же строкам products, позиции вставляются одним многострочным INSERT.
+        """
+        quantity = case(items, value=Product.id)
+        total_amount = (
+            select(func.sum(Product.price * quantity))
+            .where(Product.id.in_(list(items)))
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            insert(Order)
+            .values(
+                user_id=user_id,
+                address_id=address_id,
+                total_amount=total_amount,
+                status="pending",
+                created_at=datetime.utcnow(),
+            )
+            .returning(Order)
+        )
+        order = result.scalar_one()
+
+        await self.session.execute(
+            insert(order_product).values(
+                [
+                    {"order_id": order.id, "product_id": product_id, "quantity": qty}
+                    for product_id, qty in items.items()
+                ]
+            )
+        )
+        await self.session.commit()
+        return order
+
+    async def rollback(self) -> None:
+        """Откатить текущую транзакцию (вместе со списанными остатками)"""
+        await self.session.rollback()
+
+    async def release(self) -> None:
+        """Вернуть соединение в пул после последнего чтения"""
+        await release_connection(self.session)
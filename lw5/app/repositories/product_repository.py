@@ -0,0 +1,213 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import release_connection
+from app.models import Product
+from app.pagination import Page, decode_cursor, encode_cursor
+from app.repositories.queries import id_in
+from app.repositories.search import ranked_products
+from app.schemas import ProductCreate, ProductSort, ProductUpdate
+
+# Колонка сортировки и допустимые типы ее значения в курсоре
+SORT_COLUMNS = {
+    ProductSort.NAME: (Product.name, (str,)),
+    ProductSort.PRICE: (Product.price, (int, float)),
+}
+
+
+class ProductRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _select(columns: Optional[Sequence[str]] = None):
+        """SELECT товаров; с columns - только эти колонки, без ORM-объектов"""
+        if columns is not None:
+            return select(*(getattr(Product, column) for column in columns))
+        return select(Product)
+
+    @staticmethod
+    def _fetch(result, columns: Optional[Sequence[str]]) -> list:
+        return list(result.all() if columns is not None else result.scalars().all())
+
+    async def get_by_id(
+        self, product_id: int, columns: Optional[Sequence[str]] = None
+    ) -> Optional[Product]:
+        """Получить товар по ID"""
+        result = await self.session.execute(
+            self._select(columns).where(Product.id == product_id)
+        )
+        return (
+            result.one_or_none() if columns is not None else result.scalar_one_or_none()
+        )
+
+    async def get_many(
+        self, product_ids: Sequence[int], columns: Optional[Sequence[str]] = None
+    ) -> List[Product]:
+        """Получить товары по списку ID одним запросом (порядок не определен)"""
+        if not product_ids:
+            return []
+        result = await self.session.execute(
+            self._select(columns).where(id_in(self.session, Product.id, product_ids))
+        )
+        return self._fetch(result, columns)
+
+    @staticmethod
+    def _cursor_key(token: str, sort: ProductSort) -> Tuple[Any, int]:
+        values = decode_cursor(token)
+        _, value_types = SORT_COLUMNS[sort]
+        if (
+            len(values) != 2
+            or not isinstance(values[0], value_types)
+            or isinstance(values[0], bool)
+            or not isinstance(values[1], int)
+        ):
+            raise ValueError(f"Invalid cursor: {token}")
+        return values[0], values[1]
+
+    async def get_page(
+        self,
+        sort: ProductSort = ProductSort.NAME,
+        count: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[Product]:
+        """Страница каталога по курсору (keyset по (<колонка сортировки>, id))
+
+        Условие (value, id) > (:value, :id) и ORDER BY value, id идут по
+        составному индексу ix_products_<колонка>_id. С columns (должны
+        включать id и колонку сортировки) элементы страницы - строки Row.
+        """
+        if after is not None and before is not None:
+            raise ValueError("Only one of 'after' and 'before' can be given")
+
+        sort = ProductSort(sort)
+        column, _ = SORT_COLUMNS[sort]
+        key = tuple_(column, Product.id)
+        query = self._select(columns)
+
+        if before is not None:
+            query = query.where(key < tuple_(*self._cursor_key(before, sort)))
+            query = query.order_by(column.desc(), Product.id.desc())
+        else:
+            if after is not None:
+                query = query.where(key > tuple_(*self._cursor_key(after, sort)))
+            query = query.order_by(column, Product.id)
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        result = await self.session.execute(query.limit(count + 1))
+        products = self._fetch(result, columns)
+        has_more = len(products) > count
+        products = products[:count]
+
+        def cursor(product) -> str:
+            return encode_cursor([getattr(product, sort.value), product.id])
+
+        if before is not None:
+            products.reverse()
+            page = Page(items=products, next_cursor=before)
+            if has_more:
+                page.prev_cursor = cursor(products[0])
+            return page
+
+        page = Page(items=products)
+        if has_more:
+            page.next_cursor = cursor(products[-1])
+        if after is not None and products:
+            page.prev_cursor = cursor(products[0])
+        return page
+
+    @staticmethod
+    def _rank_key(token: str) -> Tuple[float, int]:
+        values = decode_cursor(token)
+        if (
+            len(values) != 2
+            or not isinstance(values[0], (int, float))
+            or isinstance(values[0], bool)
+            or not isinstance(values[1], int)
+        ):
+            raise ValueError(f"Invalid cursor: {token}")
+        return float(values[0]), values[1]
+
+    async def search(
+        self,
+        text: str,
+        count: int = 20,
+        after: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[Product]:
+        """Полнотекстовый поиск: лучшие совпадения первыми, keyset по (rank, id)
+
+        Курсор хранит rank и id последнего товара страницы; следующая
+        страница - rank < :rank OR (rank = :rank AND id > :id). rank
+        возвращается из БД и кодируется в курсор без потери точности, так что
+        равенство для тай-брейка надежно. Только прямая пагинация (after).
+        """
+        ranked = ranked_products(self.session, text)
+        # Первые две колонки - ключ курсора (rank, id), за ними товар
+        product = (
+            [Product]
+            if columns is None
+            else [getattr(Product, column) for column in columns]
+        )
+        query = select(ranked.c.rank, ranked.c.id, *product).join(
+            Product, Product.id == ranked.c.id
+        )
+
+        if after is not None:
+            rank, product_id = self._rank_key(after)
+            query = query.where(
+                or_(
+                    ranked.c.rank < rank,
+                    and_(ranked.c.rank == rank, ranked.c.id > product_id),
+                )
+            )
+        query = query.order_by(ranked.c.rank.desc(), ranked.c.id)
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        result = await self.session.execute(query.limit(count + 1))
+        rows = list(result.all())
+        has_more = len(rows) > count
+        rows = rows[:count]
+
+        page = Page(
+            items=[row[2] if columns is None else tuple(row[2:]) for row in rows]
+        )
+        if has_more:
+            page.next_cursor = encode_cursor(rows[-1][:2])
+        return page
+
+    async def create(self, product_data: ProductCreate) -> Product:
+        """Создать товар одним INSERT ... RETURNING"""
+        result = await self.session.execute(
+            insert(Product).values(**product_data.model_dump()).returning(Product)
+        )
+        product = result.scalar_one()
+        await self.session.commit()
+        return product
+
+    async def update(
+        self, product_id: int, product_data: ProductUpdate
+    ) -> Optional[Product]:
+        """Обновить товар одним UPDATE ... RETURNING"""
+        update_data = product_data.model_dump(exclude_unset=True)
+        if not update_data:
+            return await self.get_by_id(product_id)
+
+        result = await self.session.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(**update_data)
+            .returning(Product)
+            .execution_options(populate_existing=True)
+        )
+        product = result.scalar_one_or_none()
+        await self.session.commit()
+        return product
+
+    async def release(self) -> None:
+        """Вернуть соединение в пул после последнего чтения"""
+        await release_connection(self.session)
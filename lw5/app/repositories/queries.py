@@ -0,0 +1,18 @@
+from typing import Sequence
+
+from sqlalchemy import Integer, any_, bindparam
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def id_in(session: AsyncSession, column, ids: Sequence[int]):
+    """Условие column из списка ID
+
+    На PostgreSQL - column = ANY(:ids) с одним параметром-массивом: текст
+    запроса не зависит от числа ID, план переиспользуется. На остальных
+    диалектах - IN.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        values = bindparam("ids", list(ids), type_=postgresql.ARRAY(Integer))
+        return column == any_(values)
+    return column.in_(ids)
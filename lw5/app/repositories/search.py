@@ -0,0 +1,56 @@
+import re
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PRODUCT_SEARCH_CONFIG, Product
+
+# Веса полей для bm25 в SQLite: совпадение в названии важнее описания
+# (на PostgreSQL то же задают веса A/B в search_vector)
+FTS5_WEIGHTS = (10.0, 1.0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+products_fts = table("products_fts", column("rowid"))
+
+
+def fts5_match(text: str) -> str:
+    """Запрос FTS5 MATCH: каждое слово в кавычках, все слова обязательны
+
+    Синтаксис FTS5 (AND/OR/NEAR, *, :) из пользовательского ввода не
+    интерпретируется - как и websearch_to_tsquery, ввод не может сломать запрос.
+    """
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(text))
+
+
+def ranked_products(session: AsyncSession, text: str):
+    """Подзапрос (id, rank) товаров, подходящих под запрос; больший rank - лучше
+
+    PostgreSQL: search_vector @@ websearch_to_tsquery по GIN-индексу,
+    rank = ts_rank. SQLite: FTS5 MATCH, rank = -bm25 (bm25 тем меньше,
+    чем лучше совпадение). ValueError, если в запросе нет ни одного слова.
+    """
+    if not _TOKEN.search(text):
+        raise ValueError("Search query must contain at least one word")
+
+    if session.get_bind().dialect.name == "postgresql":
+        vector = literal_column("products.search_vector", TSVECTOR)
+        query = func.websearch_to_tsquery(PRODUCT_SEARCH_CONFIG, text)
+        return (
+            select(Product.id.label("id"), func.ts_rank(vector, query).label("rank"))
+            .where(vector.bool_op("@@")(query))
+            .subquery("ranked")
+        )
+
+    # Имя FTS5-таблицы как значение - так SQLite передает ее в MATCH и bm25
+    fts = literal_column("products_fts")
+    weights = (literal_column(repr(weight)) for weight in FTS5_WEIGHTS)
+    return (
+        select(
+            products_fts.c.rowid.label("id"),
+            (-func.bm25(fts, *weights)).label("rank"),
+        )
+        .where(fts.op("MATCH")(fts5_match(text)))
+        .subquery("ranked")
+    )
@@ -1,75 +1,299 @@
 # app/repositories/user_repository.py
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
 
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import release_connection
 from app.models import User
+from app.pagination import Page, decode_cursor, encode_cursor
+from app.repositories.loading import LoadProfile, user_load_options
+from app.repositories.queries import id_in
 from app.schemas import UserCreate, UserUpdate
-from sqlalchemy import delete, select, update
-from sqlalchemy.ext.asyncio import AsyncSession
+
+# Лимит параметров одного запроса в asyncpg
+MAX_QUERY_PARAMS = 32767
+
+# Строк в одном многострочном INSERT. Каждая строка связывает не больше
+# параметров, чем колонок в users (поля запроса, created_at и Python-умолчания
+# updated_at и version), поэтому размер пачки выводится из числа колонок
+BULK_CHUNK_SIZE = min(1000, MAX_QUERY_PARAMS // len(User.__table__.columns))
+
+# Строк в одной порции серверного курсора при выгрузке
+STREAM_BATCH_SIZE = 1000
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Фильтры, которые не сводятся к равенству по колонке. name_prefix
+# сравнивается с lower(name), чтобы попасть в индекс ix_users_lower_name
+FILTER_CONDITIONS = {
+    "name_prefix": lambda value: func.lower(User.name).like(
+        _escape_like(value.lower()) + "%", escape="\\"
+    ),
+    "created_after": lambda value: User.created_at >= value,
+    "created_before": lambda value: User.created_at < value,
+    "ids": lambda value: User.id.in_(value),
+}
 
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_id(self, user_id: int) -> Optional[User]:
+    @staticmethod
+    def _select(profile: LoadProfile, columns: Optional[Sequence[str]] = None):
+        """SELECT пользователей с опциями загрузки связей для профиля
+
+        Если заданы columns - только эти колонки, без ORM-объектов.
+        """
+        if columns is not None:
+            return select(*(getattr(User, column) for column in columns))
+        return select(User).options(*user_load_options(profile))
+
+    @staticmethod
+    def _fetch(result, columns: Optional[Sequence[str]]) -> list:
+        return list(result.all() if columns is not None else result.scalars().all())
+
+    async def get_by_id(
+        self, user_id: int, profile: LoadProfile = LoadProfile.SCALAR
+    ) -> Optional[User]:
         """Получить пользователя по ID"""
-        result = await self.session.execute(select(User).where(User.id == user_id))
+        result = await self.session.execute(
+            self._select(profile).where(User.id == user_id)
+        )
         return result.scalar_one_or_none()
 
-    async def get_by_filter(
-        self, count: int = 10, page: int = 1, **kwargs
-    ) -> List[User]:
-        """Получить пользователей с фильтрацией и пагинацией"""
-        query = select(User)
-
-        # Применяем фильтры
-        for key, value in kwargs.items():
-            if hasattr(User, key):
+    @staticmethod
+    def _apply_filters(query, filters: dict):
+        """Применить фильтры: специальные из FILTER_CONDITIONS, иначе
+        равенство и IN по колонкам User"""
+        for key, value in filters.items():
+            if key in FILTER_CONDITIONS:
+                query = query.where(FILTER_CONDITIONS[key](value))
+            elif hasattr(User, key):
                 if isinstance(value, (list, tuple)):
                     query = query.where(getattr(User, key).in_(value))
                 else:
                     query = query.where(getattr(User, key) == value)
+        return query
+
+    @staticmethod
+    def _cursor_id(token: str) -> int:
+        values = decode_cursor(token)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise ValueError(f"Invalid cursor: {token}")
+        return values[0]
+
+    async def get_many(
+        self,
+        user_ids: Sequence[int],
+        profile: LoadProfile = LoadProfile.SCALAR,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[User]:
+        """Получить пользователей по списку ID одним запросом
+
+        Порядок результата не определен, отсутствующие ID пропускаются.
+        С columns возвращаются строки Row из этих колонок вместо User.
+        """
+        if not user_ids:
+            return []
+        result = await self.session.execute(
+            self._select(profile, columns).where(id_in(self.session, User.id, user_ids))
+        )
+        return self._fetch(result, columns)
+
+    async def get_version(self, user_id: int) -> Optional[int]:
+        """Версия строки пользователя без загрузки остальных колонок"""
+        result = await self.session.execute(
+            select(User.version).where(User.id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_filter(
+        self,
+        count: int = 10,
+        page: int = 1,
+        profile: LoadProfile = LoadProfile.SCALAR,
+        columns: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> List[User]:
+        """Получить пользователей с фильтрацией и пагинацией
+
+        С columns возвращаются строки Row из этих колонок вместо User.
+        """
+        query = self._apply_filters(self._select(profile, columns), kwargs)
 
-        # Пагинация
+        # Пагинация (стабильный порядок по первичному ключу)
         offset = (page - 1) * count
-        query = query.offset(offset).limit(count)
+        query = query.order_by(User.id).offset(offset).limit(count)
 
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return self._fetch(result, columns)
+
+    async def get_page(
+        self,
+        count: int = 10,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        profile: LoadProfile = LoadProfile.SCALAR,
+        columns: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> Page[User]:
+        """Получить страницу пользователей по курсору (keyset-пагинация по id)
+
+        Стоимость запроса не зависит от глубины страницы: вместо OFFSET
+        используется условие по индексу первичного ключа. С columns
+        (должны включать id) элементы страницы - строки Row.
+        """
+        if after is not None and before is not None:
+            raise ValueError("Only one of 'after' and 'before' can be given")
+
+        query = self._apply_filters(self._select(profile, columns), kwargs)
+
+        if before is not None:
+            query = query.where(User.id < self._cursor_id(before))
+            query = query.order_by(User.id.desc())
+        else:
+            if after is not None:
+                query = query.where(User.id > self._cursor_id(after))
+            query = query.order_by(User.id)
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        result = await self.session.execute(query.limit(count + 1))
+        users = self._fetch(result, columns)
+        has_more = len(users) > count
+        users = users[:count]
+
+        if before is not None:
+            users.reverse()
+            page = Page(items=users, next_cursor=before)
+            if has_more:
+                page.prev_cursor = encode_cursor([users[0].id])
+            return page
+
+        page = Page(items=users)
+        if has_more:
+            page.next_cursor = encode_cursor([users[-1].id])
+        if after is not None and users:
+            page.prev_cursor = encode_cursor([users[0].id])
+        return page
+
+    async def stream_by_filter(
+        self, columns: Sequence[str], batch_size: int = STREAM_BATCH_SIZE, **kwargs
+    ) -> AsyncIterator[List[Row]]:
+        """Выгрузить пользователей порциями через серверный курсор
+
+        Возвращает строки из указанных колонок без материализации ORM-объектов,
+        в памяти одновременно находится не больше одной порции.
+        """
+        query = self._apply_filters(
+            select(*(getattr(User, column) for column in columns)), kwargs
+        ).order_by(User.id)
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=batch_size)
+        )
+        try:
+            async for partition in result.partitions():
+                yield partition
+        finally:
+            await result.close()
 
     async def create(self, user_data: UserCreate) -> User:
-        """Создать нового пользователя"""
-        user = User(**user_data.model_dump())
-        self.session.add(user)
+        """Создать нового пользователя
+
+        Один INSERT ... RETURNING вместо add + commit + refresh: объект
+        собирается из возвращенной строки, повторный SELECT не нужен.
+        """
+        result = await self.session.execute(
+            insert(User).values(**user_data.model_dump()).returning(User)
+        )
+        user = result.scalar_one()
         await self.session.commit()  # Комитим сразу
-        await self.session.refresh(user)  # Обновляем объект
         return user
 
-    async def update(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
-        """Обновить пользователя"""
-        # Получаем пользователя
-        result = await self.session.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+    def _insert(self):
+        """INSERT с поддержкой ON CONFLICT для текущего диалекта"""
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(User)
+        if dialect == "sqlite":
+            return sqlite.insert(User)
+        return insert(User)
+
+    async def bulk_create(
+        self, users_data: Sequence[UserCreate], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> List[User]:
+        """Создать пользователей многострочными INSERT ... RETURNING
+
+        Все пачки выполняются в одной транзакции. Строки с уже занятым
+        email пропускаются (ON CONFLICT DO NOTHING) и не попадают в результат.
+        """
+        now = datetime.utcnow()
+        rows = [{**data.model_dump(), "created_at": now} for data in users_data]
+
+        created: List[User] = []
+        for start in range(0, len(rows), chunk_size):
+            query = self._insert().values(rows[start : start + chunk_size])
+            if hasattr(query, "on_conflict_do_nothing"):
+                query = query.on_conflict_do_nothing(index_elements=[User.email])
+            result = await self.session.execute(query.returning(User))
+            created.extend(result.scalars().all())
 
-        if not user:
-            return None
+        await self.session.commit()
+        return created
 
+    async def update(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        expected_version: Optional[int] = None,
+    ) -> Optional[User]:
+        """Обновить пользователя одним UPDATE ... RETURNING
+
+        Версия строки увеличивается, updated_at выставляется onupdate колонки.
+        С expected_version строка обновляется, только если ее версия не
+        изменилась (оптимистическая блокировка); иначе возвращается None,
+        как и для отсутствующей строки.
+        """
         # Обновляем только переданные поля
-        update_data = user_data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(user, key, value)
+        update_data = user_data.model_dump(exclude_unset=True, exclude={"version"})
+        if not update_data:
+            user = await self.get_by_id(user_id)
+            if user is not None and expected_version not in (None, user.version):
+                return None
+            return user
+
+        query = update(User).where(User.id == user_id)
+        if expected_version is not None:
+            query = query.where(User.version == expected_version)
 
+        result = await self.session.execute(
+            query.values(**update_data, version=User.version + 1)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one_or_none()  # None - строка не найдена
         await self.session.commit()  # Комитим
-        await self.session.refresh(user)  # Обновляем
         return user
 
     async def delete(self, user_id: int) -> bool:
-        """Удалить пользователя"""
-        result = await self.session.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-
-        if user:
-            await self.session.delete(user)
-            await self.session.commit()  # Комитим
-            return True
-        return False
+        """Удалить пользователя одним DELETE ... RETURNING
+
+        Адреса удаляются каскадом на стороне БД (ON DELETE CASCADE).
+        """
+        result = await self.session.execute(
+            delete(User).where(User.id == user_id).returning(User.id)
+        )
+        deleted_id = result.scalar_one_or_none()
+        await self.session.commit()  # Комитим
+        return deleted_id is not None
+
+    async def release(self) -> None:
+        """Вернуть соединение в пул после последнего чтения"""
+        await release_connection(self.session)
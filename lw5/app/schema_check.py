@@ -0,0 +1,73 @@
+"""Проверка состояния миграций при запуске приложения
+
+Схему создает и обновляет `alembic upgrade head` (entrypoint.sh), а не
+воркеры. При старте воркер только сверяет ревизию в alembic_version с
+головами миграций из migrations/versions - одним запросом, без отражения
+таблиц - и не запускается, если база не на последней миграции.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Set
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Что делать со схемой при старте (DB_SCHEMA_STARTUP):
+# check - сверить ревизию (по умолчанию), create_all - создать таблицы по
+# моделям (локальная разработка на SQLite), skip - ничего не делать
+SCHEMA_STARTUP_MODES = ("check", "create_all", "skip")
+
+
+class SchemaMismatchError(RuntimeError):
+    """База не на последней миграции"""
+
+
+def schema_startup_mode() -> str:
+    mode = os.getenv("DB_SCHEMA_STARTUP", "check").strip().lower()
+    if mode not in SCHEMA_STARTUP_MODES:
+        raise ValueError(
+            f"DB_SCHEMA_STARTUP must be one of {', '.join(SCHEMA_STARTUP_MODES)}, "
+            f"got {mode!r}"
+        )
+    return mode
+
+
+def migration_heads(config_path: Path = ALEMBIC_INI) -> Set[str]:
+    """Головы миграций по файлам migrations/versions (без обращения к БД)"""
+    script = ScriptDirectory.from_config(Config(str(config_path)))
+    return set(script.get_heads())
+
+
+async def check_schema(engine: AsyncEngine, heads: Optional[Set[str]] = None) -> None:
+    """Сверить alembic_version с головами миграций, SchemaMismatchError при расхождении"""
+    heads = migration_heads() if heads is None else heads
+    # Ошибки подключения (база недоступна, неверные учетные данные)
+    # пробрасываются как есть: миграции их не исправят
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = set(result.scalars().all())
+        except DBAPIError as e:
+            # Запрос не прошел: "не под миграциями" только если таблицы
+            # действительно нет, иначе (например, нет прав) - исходная ошибка
+            await conn.rollback()
+            if await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table("alembic_version")
+            ):
+                raise
+            raise SchemaMismatchError(
+                "Database is not under migration control (no alembic_version table): "
+                "run `alembic upgrade head`"
+            ) from e
+
+    if current != heads:
+        raise SchemaMismatchError(
+            f"Database is at revision {', '.join(sorted(current)) or '<none>'}, "
+            f"migrations head is {', '.join(sorted(heads))}: run `alembic upgrade head`"
+        )
@@ -1,7 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+
+MAX_FILTER_IDS = 500
+MAX_ORDER_ITEMS = 100
 
 
 # Схемы для создания
@@ -17,6 +21,25 @@ class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     email: Optional[EmailStr] = None
     description: Optional[str] = Field(None, max_length=500)
+    # Ожидаемая версия строки (альтернатива заголовку If-Match)
+    version: Optional[int] = Field(None, ge=1)
+
+
+# Фильтры списка пользователей: только поля, за которыми стоит индекс
+class UserFilter(BaseModel):
+    email: Optional[str] = None
+    name_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=MAX_FILTER_IDS)
+
+    @field_validator("created_after", "created_before")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # created_at хранится как naive UTC (datetime.utcnow)
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
 
 
 # Схемы для ответов
@@ -28,6 +51,19 @@ class UserResponse(BaseModel):
     email: str
     description: Optional[str]
     created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 1
+
+
+class UserBulkConflict(BaseModel):
+    index: int
+    email: str
+    detail: str
+
+
+class UserBulkCreateResponse(BaseModel):
+    created: List[UserResponse]
+    conflicts: List[UserBulkConflict]
 
 
 class AddressResponse(BaseModel):
@@ -40,6 +76,26 @@ class AddressResponse(BaseModel):
     user_id: int
 
 
+class ProductCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    price: float = Field(..., gt=0)
+    description: Optional[str] = Field(None, max_length=1000)
+    stock_quantity: int = Field(0, ge=0)
+
+
+class ProductUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=200)
+    price: Optional[float] = Field(None, gt=0)
+    description: Optional[str] = Field(None, max_length=1000)
+    stock_quantity: Optional[int] = Field(None, ge=0)
+
+
+# Порядок листинга каталога, у каждого варианта есть индекс (<колонка>, id)
+class ProductSort(str, Enum):
+    NAME = "name"
+    PRICE = "price"
+
+
 class ProductResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -60,3 +116,37 @@ class OrderResponse(BaseModel):
     total_amount: float
     status: str
     created_at: Optional[datetime] = None
+
+
+class OrderItem(BaseModel):
+    product_id: int = Field(..., gt=0)
+    quantity: int = Field(..., gt=0, le=10_000)
+
+
+class OrderCreate(BaseModel):
+    user_id: int = Field(..., gt=0)
+    address_id: int = Field(..., gt=0)
+    items: List[OrderItem] = Field(..., min_length=1, max_length=MAX_ORDER_ITEMS)
+
+
+class OrderDetailResponse(OrderResponse):
+    items: List[OrderItem] = []
+
+
+# Связи, которые можно запросить в истории заказов (include=...)
+class OrderInclude(str, Enum):
+    PRODUCTS = "products"
+
+
+class OrderLineResponse(BaseModel):
+    quantity: int
+    product: ProductResponse
+
+
+class OrderWithProductsResponse(OrderResponse):
+    products: List[OrderLineResponse] = []
+
+
+class UserDetailResponse(UserResponse):
+    addresses: List[AddressResponse] = []
+    orders: List[OrderResponse] = []
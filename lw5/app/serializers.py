@@ -0,0 +1,117 @@
+"""Быстрая сериализация ответов через msgspec
+
+Structs повторяют поля схем ответа из app.schemas и кодируются в JSON
+напрямую из строк запроса (Row/кортежей) или ORM-объектов, без
+создания Pydantic-модели на каждую запись. Порядок полей Struct - это
+порядок колонок, которые нужно выбрать из БД.
+"""
+
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple, Type
+
+import msgspec
+
+
+class UserStruct(msgspec.Struct, gc=False):
+    id: int
+    name: str
+    email: str
+    description: Optional[str]
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 1
+
+
+class _VersionStruct(msgspec.Struct):
+    version: int
+
+
+class AddressStruct(msgspec.Struct, gc=False):
+    id: int
+    street: str
+    city: str
+    postal_code: str
+    user_id: int
+
+
+class ProductStruct(msgspec.Struct, gc=False):
+    id: int
+    name: str
+    price: float
+    description: Optional[str]
+    stock_quantity: int
+    created_at: Optional[datetime] = None
+
+
+class OrderStruct(msgspec.Struct, gc=False):
+    id: int
+    user_id: int
+    address_id: int
+    total_amount: float
+    status: str
+    created_at: Optional[datetime] = None
+
+
+class OrderLineStruct(msgspec.Struct, gc=False):
+    quantity: int
+    product: ProductStruct
+
+
+class OrderWithProductsStruct(OrderStruct, gc=False):
+    products: List[OrderLineStruct] = msgspec.field(default_factory=list)
+
+
+class PagePayload(msgspec.Struct, gc=False):
+    """Сериализованная страница списка с курсорами (для кэша)"""
+
+    body: msgspec.Raw
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    # Число элементов в body - чтобы не разбирать JSON ради проверки
+    item_count: int = 0
+
+
+_encoder = msgspec.json.Encoder()
+_version_decoder = msgspec.json.Decoder(_VersionStruct)
+_page_decoder = msgspec.json.Decoder(PagePayload)
+
+
+def struct_fields(struct: Type[msgspec.Struct]) -> Tuple[str, ...]:
+    """Имена полей (и колонок для SELECT) в порядке Struct"""
+    return struct.__struct_fields__
+
+
+def encode_rows(struct: Type[msgspec.Struct], rows: Iterable[Tuple[Any, ...]]) -> bytes:
+    """JSON-массив из строк, колонки которых идут в порядке полей struct"""
+    return _encoder.encode([struct(*row) for row in rows])
+
+
+def encode_row(struct: Type[msgspec.Struct], row: Tuple[Any, ...]) -> bytes:
+    """JSON-объект из одной строки (колонки в порядке полей struct)"""
+    return _encoder.encode(struct(*row))
+
+
+def encode_objects(struct: Type[msgspec.Struct], objects: Iterable[Any]) -> bytes:
+    """JSON-массив из ORM-объектов (читаются только поля struct)"""
+    fields = struct.__struct_fields__
+    return _encoder.encode(
+        [struct(*[getattr(obj, field) for field in fields]) for obj in objects]
+    )
+
+
+def encode_structs(structs: Iterable[msgspec.Struct]) -> bytes:
+    """JSON-массив из готовых Struct (например, с вложенными списками)"""
+    return _encoder.encode(list(structs))
+
+
+def decode_version(payload: bytes) -> int:
+    """Поле version из сериализованного объекта без разбора остальных полей"""
+    return _version_decoder.decode(payload).version
+
+
+def encode_page(page: PagePayload) -> bytes:
+    return _encoder.encode(page)
+
+
+def decode_page(payload: bytes) -> PagePayload:
+    return _page_decoder.decode(payload)
@@ -0,0 +1,136 @@
+from typing import Dict, List, Optional, Tuple
+
+from msgspec import Raw
+
+from app.cache import CacheBackend
+from app.exceptions import BadRequestException, ConflictException
+from app.models import Order
+from app.repositories.order_repository import OrderRepository
+from app.schemas import OrderCreate, OrderItem
+from app.serializers import (
+    OrderLineStruct,
+    OrderStruct,
+    OrderWithProductsStruct,
+    PagePayload,
+    ProductStruct,
+    encode_rows,
+    encode_structs,
+    struct_fields,
+)
+from app.services.product_service import PRODUCT_COLUMNS, product_cache_key
+
+ORDER_COLUMNS = struct_fields(OrderStruct)
+
+
+def _ids(product_ids) -> str:
+    return ", ".join(map(str, product_ids))
+
+
+class OrderService:
+    """Оформление заказов с атомарным списанием остатков
+
+    Остатки проверяются и списываются только условным UPDATE в БД: чтение
+    товаров нужно для проверки существования и быстрого отказа, но не служит
+    основанием для записи, поэтому конкурентные заказы не продают лишнего.
+    """
+
+    def __init__(
+        self,
+        order_repository: OrderRepository,
+        catalog_cache: Optional[CacheBackend] = None,
+    ):
+        self.order_repository = order_repository
+        self.catalog_cache = catalog_cache
+
+    @staticmethod
+    def _merge_items(items: List[OrderItem]) -> Dict[int, int]:
+        """Количество по товарам; повторы одного товара складываются"""
+        merged: Dict[int, int] = {}
+        for item in items:
+            merged[item.product_id] = merged.get(item.product_id, 0) + item.quantity
+        return merged
+
+    async def place(self, order_data: OrderCreate) -> Tuple[Order, List[OrderItem]]:
+        """Оформить заказ: товары одним запросом, списание одним UPDATE"""
+        items = self._merge_items(order_data.items)
+
+        rows = await self.order_repository.get_products_for_order(
+            list(items), order_data.user_id, order_data.address_id
+        )
+        found = {row.id: row for row in rows}
+        missing = [product_id for product_id in items if product_id not in found]
+        if missing or not rows[0].address_ok:
+            # Заказ отклоняется - соединение больше не нужно
+            await self.order_repository.release()
+        if missing:
+            raise BadRequestException(detail=f"Products not found: {_ids(missing)}")
+        if not rows[0].address_ok:
+            raise BadRequestException(
+                detail=f"Address {order_data.address_id} does not belong to "
+                f"user {order_data.user_id}"
+            )
+
+        # Заведомо недостаточный остаток - отказ без блокировки строк
+        short = [pid for pid, qty in items.items() if found[pid].stock_quantity < qty]
+        if not short:
+            reserved = set(await self.order_repository.reserve_stock(items))
+            short = [product_id for product_id in items if product_id not in reserved]
+            if short:
+                await self.order_repository.rollback()
+        else:
+            await self.order_repository.release()
+        if short:
+            raise ConflictException(
+                detail=f"Insufficient stock for products: {_ids(short)}"
+            )
+
+        order = await self.order_repository.create(
+            order_data.user_id, order_data.address_id, items
+        )
+        # Остатки в кэше каталога устарели; страницы листинга живут до TTL
+        if self.catalog_cache is not None:
+            for product_id in items:
+                await self.catalog_cache.delete(product_cache_key(product_id))
+
+        return order, [
+            OrderItem(product_id=product_id, quantity=quantity)
+            for product_id, quantity in items.items()
+        ]
+
+    async def get_user_page(
+        self,
+        user_id: int,
+        count: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        include_products: bool = False,
+    ) -> PagePayload:
+        """Сериализованная страница истории заказов пользователя
+
+        Без include_products - один запрос по колонкам заказа. С ним позиции
+        и товары загружаются вторым запросом только для заказов страницы.
+        """
+        page = await self.order_repository.get_user_page(
+            user_id, count=count, after=after, before=before, columns=ORDER_COLUMNS
+        )
+        if not include_products:
+            await self.order_repository.release()
+            body = encode_rows(OrderStruct, page.items)
+        else:
+            orders = [OrderWithProductsStruct(*row) for row in page.items]
+            by_id = {order.id: order for order in orders}
+            lines = await self.order_repository.get_order_lines(
+                list(by_id), columns=PRODUCT_COLUMNS
+            )
+            await self.order_repository.release()
+            for order_id, quantity, *product in lines:
+                by_id[order_id].products.append(
+                    OrderLineStruct(quantity=quantity, product=ProductStruct(*product))
+                )
+            body = encode_structs(orders)
+        return PagePayload(
+            body=Raw(body),
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+            item_count=len(page.items),
+        )
@@ -0,0 +1,154 @@
+from typing import List, Optional, Sequence, Tuple
+
+from msgspec import Raw
+
+from app.cache import CacheBackend
+from app.models import Product
+from app.repositories.product_repository import ProductRepository
+from app.schemas import ProductCreate, ProductSort, ProductUpdate
+from app.serializers import (
+    PagePayload,
+    ProductStruct,
+    decode_page,
+    encode_page,
+    encode_row,
+    encode_rows,
+    struct_fields,
+)
+
+PRODUCT_COLUMNS = struct_fields(ProductStruct)
+
+
+def product_cache_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def product_page_cache_key(
+    sort: ProductSort, count: int, after: Optional[str], before: Optional[str]
+) -> str:
+    return f"products:{ProductSort(sort).value}:{count}:{after or ''}:{before or ''}"
+
+
+class ProductService:
+    """Каталог товаров с кэшем сериализованных ответов
+
+    Товары читаются на порядки чаще, чем меняются, поэтому кэшируются и
+    отдельные товары, и страницы листинга. Любая запись очищает весь кэш
+    каталога: точечно найти затронутые страницы дороже, чем перечитать их.
+    """
+
+    def __init__(
+        self,
+        product_repository: ProductRepository,
+        cache: Optional[CacheBackend] = None,
+    ):
+        self.product_repository = product_repository
+        self.cache = cache
+
+    async def get_payload_by_id(self, product_id: int) -> Optional[bytes]:
+        """Сериализованный ProductResponse (JSON) через кэш"""
+        if self.cache is not None:
+            payload = await self.cache.get(product_cache_key(product_id))
+            if payload is not None:
+                return payload
+
+        row = await self.product_repository.get_by_id(
+            product_id, columns=PRODUCT_COLUMNS
+        )
+        await self.product_repository.release()
+        if row is None:
+            return None
+
+        payload = encode_row(ProductStruct, row)
+        if self.cache is not None:
+            await self.cache.set(product_cache_key(product_id), payload)
+        return payload
+
+    async def get_many(
+        self, product_ids: Sequence[int]
+    ) -> Tuple[List[bytes], List[int]]:
+        """Сериализованные товары в порядке product_ids и отсутствующие ID"""
+        unique_ids = list(dict.fromkeys(product_ids))
+        payloads = {}
+        if self.cache is not None:
+            for product_id in unique_ids:
+                payload = await self.cache.get(product_cache_key(product_id))
+                if payload is not None:
+                    payloads[product_id] = payload
+
+        misses = [product_id for product_id in unique_ids if product_id not in payloads]
+        if misses:
+            rows = await self.product_repository.get_many(
+                misses, columns=PRODUCT_COLUMNS
+            )
+            await self.product_repository.release()
+            for row in rows:
+                payload = encode_row(ProductStruct, row)
+                payloads[row.id] = payload
+                if self.cache is not None:
+                    await self.cache.set(product_cache_key(row.id), payload)
+
+        found = [payloads[pid] for pid in product_ids if pid in payloads]
+        missing = [pid for pid in unique_ids if pid not in payloads]
+        return found, missing
+
+    async def get_page(
+        self,
+        sort: ProductSort = ProductSort.NAME,
+        count: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> PagePayload:
+        """Сериализованная страница каталога с курсорами через кэш"""
+        key = product_page_cache_key(sort, count, after, before)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return decode_page(cached)
+
+        page = await self.product_repository.get_page(
+            sort, count, after, before, columns=PRODUCT_COLUMNS
+        )
+        await self.product_repository.release()
+        result = PagePayload(
+            body=Raw(encode_rows(ProductStruct, page.items)),
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+            item_count=len(page.items),
+        )
+        if self.cache is not None:
+            await self.cache.set(key, encode_page(result))
+        return result
+
+    async def search(
+        self, text: str, count: int = 20, after: Optional[str] = None
+    ) -> PagePayload:
+        """Сериализованная страница результатов поиска (без кэша)"""
+        page = await self.product_repository.search(
+            text, count=count, after=after, columns=PRODUCT_COLUMNS
+        )
+        await self.product_repository.release()
+        return PagePayload(
+            body=Raw(encode_rows(ProductStruct, page.items)),
+            next_cursor=page.next_cursor,
+            item_count=len(page.items),
+        )
+
+    async def invalidate(self) -> None:
+        """Сбросить кэш каталога после записи"""
+        if self.cache is not None:
+            await self.cache.clear()
+
+    async def create(self, product_data: ProductCreate) -> Product:
+        """Создать товар"""
+        product = await self.product_repository.create(product_data)
+        await self.invalidate()
+        return product
+
+    async def update(
+        self, product_id: int, product_data: ProductUpdate
+    ) -> Optional[Product]:
+        """Обновить товар"""
+        product = await self.product_repository.update(product_id, product_data)
+        await self.invalidate()
+        return product
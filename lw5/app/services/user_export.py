@@ -0,0 +1,65 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.repositories.user_repository import UserRepository
+from app.schemas import UserResponse
+
+EXPORT_COLUMNS = list(UserResponse.model_fields)
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES: Dict[ExportFormat, str] = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunk(rows: Iterable[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _ndjson_chunk(rows: Iterable[Row]) -> bytes:
+    return b"".join(
+        UserResponse.model_validate(row).model_dump_json().encode() + b"\n"
+        for row in rows
+    )
+
+
+async def export_users(
+    session_factory: async_sessionmaker, export_format: ExportFormat, **filters
+) -> AsyncIterator[bytes]:
+    """Поток пользователей в NDJSON или CSV, по одному чанку на порцию курсора
+
+    Сессия открывается здесь, а не берется из зависимостей запроса: тело
+    ответа отправляется уже после того, как Litestar закроет сессию запроса.
+    """
+    if export_format == ExportFormat.CSV:
+        yield _csv_chunk([EXPORT_COLUMNS])
+
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        async for rows in repository.stream_by_filter(EXPORT_COLUMNS, **filters):
+            if export_format == ExportFormat.CSV:
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(rows)
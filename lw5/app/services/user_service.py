@@ -1,36 +1,234 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
+from app.cache import CacheBackend
+from app.exceptions import PreconditionFailedException
 from app.models import User
+from app.pagination import Page
+from app.repositories.loading import LoadProfile
 from app.repositories.user_repository import UserRepository
-from app.schemas import UserCreate, UserUpdate
+from app.schemas import UserBulkConflict, UserCreate, UserResponse, UserUpdate
+from app.serializers import UserStruct, decode_version, encode_row, struct_fields
+
+
+def user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        cache: Optional[CacheBackend] = None,
+        fill_cache: bool = True,
+    ):
+        """fill_cache=False - кэш только читается: данные реплики могут
+        отставать, и сохраненная в кэш старая строка пережила бы запись"""
         self.user_repository = user_repository
+        self.cache = cache
+        self.fill_cache = fill_cache
 
-    async def get_by_id(self, user_id: int) -> Optional[User]:
+    async def get_by_id(
+        self, user_id: int, profile: LoadProfile = LoadProfile.SCALAR
+    ) -> Optional[User]:
         """Получить пользователя по ID"""
-        return await self.user_repository.get_by_id(user_id)
+        user = await self.user_repository.get_by_id(user_id, profile=profile)
+        await self.user_repository.release()
+        return user
+
+    async def get_payload_by_id(self, user_id: int) -> Optional[bytes]:
+        """Получить сериализованный UserResponse (JSON) через кэш
+
+        При попадании в кэш ни сессия, ни ORM не используются.
+        """
+        if self.cache is not None:
+            payload = await self.cache.get(user_cache_key(user_id))
+            if payload is not None:
+                return payload
+
+        user = await self.user_repository.get_by_id(user_id)
+        await self.user_repository.release()
+        if user is None:
+            return None
+
+        payload = UserResponse.model_validate(user).model_dump_json().encode()
+        if self.cache is not None and self.fill_cache:
+            await self.cache.set(user_cache_key(user_id), payload)
+        return payload
+
+    async def get_version(self, user_id: int) -> Optional[int]:
+        """Версия пользователя для условных запросов
+
+        Из кэша, если там есть ответ, иначе запрос одной колонки version.
+        """
+        if self.cache is not None:
+            payload = await self.cache.get(user_cache_key(user_id))
+            if payload is not None:
+                return decode_version(payload)
+        version = await self.user_repository.get_version(user_id)
+        await self.user_repository.release()
+        return version
+
+    async def get_many(self, user_ids: Sequence[int]) -> Tuple[List[bytes], List[int]]:
+        """Получить сериализованных пользователей (JSON) по списку ID
+
+        Сначала кэш, затем один запрос за всеми промахами. Возвращает
+        payload в порядке user_ids (без отсутствующих) и список
+        отсутствующих ID.
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        payloads = {}
+        if self.cache is not None:
+            for user_id in unique_ids:
+                payload = await self.cache.get(user_cache_key(user_id))
+                if payload is not None:
+                    payloads[user_id] = payload
+
+        misses = [user_id for user_id in unique_ids if user_id not in payloads]
+        if misses:
+            rows = await self.user_repository.get_many(
+                misses, columns=struct_fields(UserStruct)
+            )
+            await self.user_repository.release()
+            for row in rows:
+                payload = encode_row(UserStruct, row)
+                payloads[row.id] = payload
+                if self.cache is not None and self.fill_cache:
+                    await self.cache.set(user_cache_key(row.id), payload)
+
+        found = [payloads[user_id] for user_id in user_ids if user_id in payloads]
+        missing = [user_id for user_id in unique_ids if user_id not in payloads]
+        return found, missing
+
+    async def _invalidate(self, user_id: int) -> None:
+        if self.cache is not None:
+            await self.cache.delete(user_cache_key(user_id))
 
     async def get_by_filter(
-        self, count: int = 10, page: int = 1, **kwargs
+        self,
+        count: int = 10,
+        page: int = 1,
+        profile: LoadProfile = LoadProfile.SCALAR,
+        columns: Optional[Sequence[str]] = None,
+        **kwargs,
     ) -> List[User]:
         """Получить пользователей с фильтрацией"""
-        return await self.user_repository.get_by_filter(count, page, **kwargs)
+        users = await self.user_repository.get_by_filter(
+            count, page, profile=profile, columns=columns, **kwargs
+        )
+        await self.user_repository.release()
+        return users
 
-    async def create(self, user_data: UserCreate) -> User:
-        """Создать пользователя с бизнес-логикой"""
+    async def get_page(
+        self,
+        count: int = 10,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        profile: LoadProfile = LoadProfile.SCALAR,
+        columns: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> Page[User]:
+        """Получить страницу пользователей по курсору"""
+        result = await self.user_repository.get_page(
+            count, after, before, profile=profile, columns=columns, **kwargs
+        )
+        await self.user_repository.release()
+        return result
+
+    @staticmethod
+    def _apply_defaults(user_data: UserCreate) -> None:
         # Пример бизнес-логики
         if not user_data.description:
             user_data.description = f"Пользователь {user_data.name}"
 
-        return await self.user_repository.create(user_data)
+    async def create(self, user_data: UserCreate) -> User:
+        """Создать пользователя с бизнес-логикой"""
+        self._apply_defaults(user_data)
+
+        user = await self.user_repository.create(user_data)
+        # ID мог остаться в кэше от ранее удаленной записи
+        await self._invalidate(user.id)
+        return user
+
+    async def bulk_create(
+        self, users_data: Sequence[UserCreate]
+    ) -> Tuple[List[User], List[UserBulkConflict]]:
+        """Создать пользователей пачкой, вернуть созданных и конфликты по email"""
+        conflicts: List[UserBulkConflict] = []
+        unique: List[UserCreate] = []
+        seen = set()
+        for index, user_data in enumerate(users_data):
+            if user_data.email in seen:
+                conflicts.append(
+                    UserBulkConflict(
+                        index=index,
+                        email=user_data.email,
+                        detail="Duplicate email in request",
+                    )
+                )
+                continue
+            seen.add(user_data.email)
+            self._apply_defaults(user_data)
+            unique.append(user_data)
+
+        users = await self.user_repository.bulk_create(unique)
+        for user in users:
+            await self._invalidate(user.id)
+
+        # RETURNING не гарантирует порядок строк - сопоставляем по email
+        by_email = {user.email: user for user in users}
+        duplicates = {conflict.index for conflict in conflicts}
+        created: List[User] = []
+        for index, user_data in enumerate(users_data):
+            if index in duplicates:
+                continue
+            user = by_email.get(user_data.email)
+            if user is not None:
+                created.append(user)
+            else:
+                conflicts.append(
+                    UserBulkConflict(
+                        index=index,
+                        email=user_data.email,
+                        detail=f"User with email {user_data.email} already exists",
+                    )
+                )
+
+        conflicts.sort(key=lambda conflict: conflict.index)
+        return created, conflicts
+
+    async def update(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        expected_version: Optional[int] = None,
+    ) -> Optional[User]:
+        """Обновить пользователя
+
+        Если задана ожидаемая версия (аргумент или поле version), а строка
+        уже изменена другим запросом - PreconditionFailedException.
+        """
+        if expected_version is None:
+            expected_version = user_data.version
+
+        user = await self.user_repository.update(
+            user_id, user_data, expected_version=expected_version
+        )
+        await self._invalidate(user_id)
 
-    async def update(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
-        """Обновить пользователя"""
-        return await self.user_repository.update(user_id, user_data)
+        if user is None and expected_version is not None:
+            # Доп. запрос только на пути ошибки: конфликт версий или нет строки
+            current_version = await self.user_repository.get_version(user_id)
+            if current_version is not None:
+                raise PreconditionFailedException(
+                    detail=(
+                        f"User with ID {user_id} has version {current_version}, "
+                        f"expected {expected_version}"
+                    )
+                )
+        return user
 
     async def delete(self, user_id: int) -> bool:
         """Удалить пользователя"""
-        return await self.user_repository.delete(user_id)
+        deleted = await self.user_repository.delete(user_id)
+        await self._invalidate(user_id)
+        return deleted
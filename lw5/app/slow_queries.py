@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, List, Optional, Set
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Модули, чьи методы считаются источником запроса
+CALLER_MODULES = ("app.repositories", "app.services")
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE off, FORMAT JSON) "
+
+_PLACEHOLDER = r"(?:\?|\$\d+|%s|%\(\w+\)s|:\w+)"
+# IN (?, ?, ?) -> IN (?...), чтобы запросы с разной длиной списка совпадали
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+# VALUES (...), (...), ... многострочной вставки -> VALUES (...), ...
+_VALUES_ROWS = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL без переносов строк и с свернутыми списками плейсхолдеров"""
+    statement = " ".join(statement.split())
+    statement = _PLACEHOLDER_LIST.sub("(?...)", statement)
+    return _VALUES_ROWS.sub(r"\1, ...", statement)
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Типы параметров без значений (значения могут содержать персональные данные)"""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameters_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def find_caller() -> Optional[str]:
+    """Метод репозитория/сервиса, выполнивший запрос
+
+    Асинхронный код вызывает драйвер из дочернего greenlet, поэтому стек
+    обходится и по родительским greenlet. Вызывается только для медленных
+    запросов.
+    """
+    current = greenlet.getcurrent()
+    frame = sys._getframe(1)
+    while True:
+        while frame is not None:
+            if frame.f_globals.get("__name__", "").startswith(CALLER_MODULES):
+                return frame.f_code.co_qualname
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: Any
+    duration_ms: float
+    caller: Optional[str]
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    plan: Any = None
+    plan_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["recorded_at"] = self.recorded_at.isoformat()
+        return data
+
+
+class SlowQueryLog:
+    """Журнал медленных запросов движка (кольцевой буфер)
+
+    На PostgreSQL для каждой записи в фоне снимается план
+    EXPLAIN (ANALYZE off, FORMAT JSON) через отдельное соединение пула,
+    чтобы не задерживать запрос, который оказался медленным.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: Optional[float],
+        maxsize: int = 100,
+        explain: bool = True,
+        max_pending_explains: int = 2,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_pending_explains = max_pending_explains
+        self._entries: Deque[SlowQuery] = deque(maxlen=maxsize)
+        self._pending: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> "SlowQueryLog":
+        """Настройки из SLOW_QUERY_*; без SLOW_QUERY_THRESHOLD_MS журнал выключен"""
+        threshold = os.getenv("SLOW_QUERY_THRESHOLD_MS")
+        return cls(
+            threshold_ms=float(threshold) if threshold else None,
+            maxsize=int(os.getenv("SLOW_QUERY_LOG_SIZE", "100")),
+            explain=os.getenv("SLOW_QUERY_EXPLAIN", "true").lower()
+            in ("1", "true", "yes", "on"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms is not None
+
+    def install(self, engine: AsyncEngine) -> None:
+        """Подписаться на события движка (ничего не делает, если журнал выключен)"""
+        if not self.enabled:
+            return
+
+        sync_engine = engine.sync_engine
+        explain = self.explain and sync_engine.dialect.name == "postgresql"
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            context._slow_query_started = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+            duration_ms = (time.perf_counter() - context._slow_query_started) * 1000
+            if duration_ms < self.threshold_ms:
+                return
+            if statement.lstrip().upper().startswith("EXPLAIN"):
+                return
+
+            entry = SlowQuery(
+                statement=normalize_sql(statement),
+                parameters=parameters_shape(parameters, many),
+                duration_ms=round(duration_ms, 3),
+                caller=find_caller(),
+            )
+            self._entries.append(entry)
+            logger.warning(
+                "Slow query %.1f ms in %s: %s",
+                entry.duration_ms,
+                entry.caller or "<unknown>",
+                entry.statement,
+            )
+            if explain and not many:
+                self._schedule_explain(engine, entry, statement, parameters)
+
+    def _schedule_explain(
+        self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any
+    ) -> None:
+        if len(self._pending) >= self.max_pending_explains:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Пустой контекст: время EXPLAIN не попадает в метрики HTTP-запроса
+        task = loop.create_task(
+            self._explain(engine, entry, statement, parameters),
+            context=contextvars.Context(),
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    @staticmethod
+    async def _explain(
+        engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any
+    ) -> None:
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    EXPLAIN_PREFIX + statement, parameters
+                )
+                entry.plan = result.scalar()
+        except Exception as exc:
+            entry.plan_error = str(exc)
+            logger.warning("EXPLAIN failed for slow query: %s", exc)
+
+    def entries(self) -> List[SlowQuery]:
+        """Записи от новых к старым"""
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "queries": [entry.as_dict() for entry in self.entries()],
+        }
@@ -3,12 +3,13 @@ import os
 from logging.config import fileConfig
 
 from alembic import context
-# Импорт моделей
-from app.models import Base
 from dotenv import load_dotenv
 from sqlalchemy import pool
 from sqlalchemy.ext.asyncio import create_async_engine
 
+# Импорт моделей
+from app.models import PRODUCT_SEARCH_OBJECTS, Base
+
 # Загрузка Alembic-конфигурации
 config = context.config
 if config.config_file_name is not None:
@@ -38,9 +39,20 @@ def run_migrations_online() -> None:
     asyncio.run(do_run_migrations())
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Объекты полнотекстового поиска создаются DDL, их нет в метаданных"""
+    if reflected and compare_to is None and name is not None:
+        return not (name in PRODUCT_SEARCH_OBJECTS or name.startswith("products_fts"))
+    return True
+
+
 def run_migrations_sync(connection):
     """Синхронная функция для Alembic."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
     with context.begin_transaction():
         context.run_migrations()
 
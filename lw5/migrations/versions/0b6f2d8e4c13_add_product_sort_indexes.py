@@ -0,0 +1,31 @@
+"""Add composite product sort indexes
+
+Revision ID: 0b6f2d8e4c13
+Revises: e7a3c5d91b24
+Create Date: 2026-10-18 15:21:47.392016
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6f2d8e4c13"
+down_revision: Union[str, Sequence[str], None] = "e7a3c5d91b24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-пагинация каталога: ORDER BY <колонка>, id и условие
+    # (<колонка>, id) > (:value, :id) читаются по индексу без сортировки
+    op.create_index("ix_products_name_id", "products", ["name", "id"], unique=False)
+    op.create_index("ix_products_price_id", "products", ["price", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_price_id", table_name="products")
+    op.drop_index("ix_products_name_id", table_name="products")
@@ -0,0 +1,52 @@
+"""Addresses user FK on delete cascade
+
+Revision ID: 3f1b6d0c9e27
+Revises: a9d172c711e1
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1b6d0c9e27"
+down_revision: Union[str, Sequence[str], None] = "a9d172c711e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# SQLite не дает имен внешним ключам: при отражении таблицы в batch-режиме
+# ключ получает то же имя, что PostgreSQL дал ему по умолчанию
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Адреса удаляются вместе с пользователем на стороне БД, без загрузки в ORM.
+    # batch_alter_table: на SQLite - пересоздание таблицы, на PostgreSQL -
+    # обычные ALTER TABLE
+    with op.batch_alter_table(
+        "addresses", naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint("addresses_user_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key(
+            "addresses_user_id_fkey",
+            "users",
+            ["user_id"],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table(
+        "addresses", naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint("addresses_user_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key(
+            "addresses_user_id_fkey", "users", ["user_id"], ["id"]
+        )
@@ -0,0 +1,35 @@
+"""Add orders (user_id, created_at desc, id) index
+
+Revision ID: 5e8c1a4b7d02
+Revises: 0b6f2d8e4c13
+Create Date: 2026-10-18 16:04:33.518274
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8c1a4b7d02"
+down_revision: Union[str, Sequence[str], None] = "0b6f2d8e4c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # История заказов GET /users/{id}/orders: поиск по user_id и порядок
+    # created_at DESC, id берутся из индекса без сортировки
+    op.create_index(
+        "ix_orders_user_id_created_at_id",
+        "orders",
+        ["user_id", sa.text("created_at DESC"), "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_orders_user_id_created_at_id", table_name="orders")
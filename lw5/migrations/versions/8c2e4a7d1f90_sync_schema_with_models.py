@@ -0,0 +1,70 @@
+"""Sync schema with models
+
+Revision ID: 8c2e4a7d1f90
+Revises: 3f1b6d0c9e27
+Create Date: 2026-10-18 11:02:15.604117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e4a7d1f90"
+down_revision: Union[str, Sequence[str], None] = "3f1b6d0c9e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Колонки, объявленные в app/models.py, но не созданные начальной миграцией.
+# Базы, созданные через Base.metadata.create_all, уже содержат их, поэтому
+# добавляем только отсутствующие.
+MISSING_COLUMNS = {
+    "users": [
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    ],
+    "products": [
+        sa.Column("stock_quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    ],
+    "orders": [
+        sa.Column("status", sa.String(), nullable=True, server_default="pending"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    ],
+    "order_product": [
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="1"),
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    for table, columns in MISSING_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+
+    # Цены и суммы в моделях - Float, начальная миграция создала Integer.
+    # SQLite не умеет ALTER COLUMN: batch-режим пересоздает таблицу
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.alter_column("price", type_=sa.Float())
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.alter_column("total_amount", type_=sa.Float())
+
+    existing_indexes = {index["name"] for index in inspector.get_indexes("products")}
+    if "ix_products_name" not in existing_indexes:
+        op.create_index("ix_products_name", "products", ["name"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Колонки могли существовать до этой ревизии (create_all), поэтому
+    # откат не удаляет их
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.alter_column("total_amount", type_=sa.Integer())
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.alter_column("price", type_=sa.Integer())
@@ -0,0 +1,77 @@
+"""Add product full-text search
+
+Revision ID: 9a4f7c2e6b15
+Revises: 5e8c1a4b7d02
+Create Date: 2026-10-18 16:52:09.137420
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4f7c2e6b15"
+down_revision: Union[str, Sequence[str], None] = "5e8c1a4b7d02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # STORED-колонка заполняется для существующих строк при ADD COLUMN
+        op.execute("""
+            ALTER TABLE products ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+                || setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+            ) STORED
+            """)
+        op.execute(
+            "CREATE INDEX ix_products_search_vector "
+            "ON products USING gin (search_vector)"
+        )
+    elif dialect == "sqlite":
+        op.execute("""
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                name, description, content='products', content_rowid='id'
+            )
+            """)
+        op.execute("""
+            CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name, description)
+                VALUES (new.id, new.name, new.description);
+            END
+            """)
+        op.execute("""
+            CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+            END
+            """)
+        op.execute("""
+            CREATE TRIGGER products_fts_update
+                AFTER UPDATE OF name, description ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+                INSERT INTO products_fts(rowid, name, description)
+                VALUES (new.id, new.name, new.description);
+            END
+            """)
+        # Индексируем уже существующие товары
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_products_search_vector", table_name="products")
+        op.drop_column("products", "search_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS products_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_insert")
+        op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,36 @@
+"""Add user filter indexes
+
+Revision ID: d4b9e1f6a352
+Revises: 8c2e4a7d1f90
+Create Date: 2026-10-18 11:09:47.281930
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4b9e1f6a352"
+down_revision: Union[str, Sequence[str], None] = "8c2e4a7d1f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Фильтры created_after/created_before
+    op.create_index("ix_users_created_at", "users", ["created_at"])
+    # Фильтр name_prefix: lower(name) LIKE 'prefix%'. text_pattern_ops
+    # (LIKE по префиксу при любой локали) есть только в PostgreSQL
+    expression = "lower(name)"
+    if op.get_bind().dialect.name == "postgresql":
+        expression += " text_pattern_ops"
+    op.create_index("ix_users_lower_name", "users", [sa.text(expression)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_lower_name", table_name="users")
+    op.drop_index("ix_users_created_at", table_name="users")
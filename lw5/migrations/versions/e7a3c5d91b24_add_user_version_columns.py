@@ -0,0 +1,34 @@
+"""Add user updated_at and version columns
+
+Revision ID: e7a3c5d91b24
+Revises: d4b9e1f6a352
+Create Date: 2026-10-18 14:02:11.804215
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c5d91b24"
+down_revision: Union[str, Sequence[str], None] = "d4b9e1f6a352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # server_default заполняет существующие строки без отдельного UPDATE
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "version")
+    op.drop_column("users", "updated_at")
@@ -4,17 +4,36 @@ from typing import AsyncGenerator, Generator
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import enable_sqlite_foreign_keys
 from app.models import Base
 from app.repositories.user_repository import UserRepository
 from app.services.user_service import UserService
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
-from sqlalchemy.pool import StaticPool
+from tests.query_budget import QueryRecorder
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Проверка бюджета запросов для тестов с маркером query_budget
+
+    Считаются запросы всех движков, но только в теле теста - подготовка
+    и очистка в фикстурах в бюджет не входят.
+    """
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    with QueryRecorder() as recorder:
+        result = yield
+    recorder.check_budget(marker.args[0])
+    return result
+
+
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
     """Create event loop for async tests"""
@@ -32,6 +51,7 @@ async def test_engine():
         poolclass=StaticPool,
         connect_args={"check_same_thread": False},
     )
+    enable_sqlite_foreign_keys(engine)
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -59,6 +79,13 @@ async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+@pytest.fixture
+def query_recorder(test_engine) -> Generator[QueryRecorder, None, None]:
+    """Запись запросов тестового движка"""
+    with QueryRecorder(test_engine) as recorder:
+        yield recorder
+
+
 @pytest.fixture
 async def clean_db(test_session: AsyncSession):
     """Clean database - уже встроено в test_session"""
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """Запись SQL-запросов через событие before_cursor_execute
+
+    target - AsyncEngine, Engine или класс Engine (все движки процесса).
+    """
+
+    def __init__(self, target: Union[AsyncEngine, Engine, type] = Engine):
+        self.target = target.sync_engine if isinstance(target, AsyncEngine) else target
+        self.statements: List[str] = []
+        self._listening = False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def start(self) -> "QueryRecorder":
+        if not self._listening:
+            event.listen(self.target, "before_cursor_execute", self._record)
+            self._listening = True
+        return self
+
+    def stop(self) -> None:
+        if self._listening:
+            event.remove(self.target, "before_cursor_execute", self._record)
+            self._listening = False
+
+    def __enter__(self) -> "QueryRecorder":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def check_budget(self, budget: int, since: int = 0) -> None:
+        executed = self.statements[since:]
+        if len(executed) > budget:
+            listing = "\n".join(
+                f"  {i}. {' '.join(statement.split())}"
+                for i, statement in enumerate(executed, 1)
+            )
+            raise QueryBudgetExceeded(
+                f"Expected at most {budget} queries, got {len(executed)}:\n{listing}"
+            )
+
+    @contextmanager
+    def assert_max_queries(self, budget: int) -> Iterator["QueryRecorder"]:
+        """Блок должен выполнить не больше budget запросов"""
+        since = self.count
+        self.start()
+        yield self
+        self.check_budget(budget, since)
+
+
+@contextmanager
+def assert_max_queries(
+    budget: int, target: Union[AsyncEngine, Engine, type] = Engine
+) -> Iterator[QueryRecorder]:
+    """Блок должен выполнить не больше budget запросов на target"""
+    with QueryRecorder(target) as recorder:
+        yield recorder
+    recorder.check_budget(budget)
@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.cache import InMemorySharedCache, LRUCache, TieredCache
+from app.models import User
+from app.schemas import UserUpdate
+from app.services.user_service import UserService, user_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    """Тесты in-process LRU кэша"""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self):
+        cache = LRUCache(maxsize=10, ttl=60)
+
+        assert await cache.get("a") is None
+        await cache.set("a", b"1")
+        assert await cache.get("a") == b"1"
+
+        stats = cache.stats
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.size == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = LRUCache(maxsize=10, ttl=5, clock=clock)
+
+        await cache.set("a", b"1")
+        clock.now = 4.9
+        assert await cache.get("a") == b"1"
+        clock.now = 5.0
+        assert await cache.get("a") is None
+        assert cache.stats.size == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        await cache.get("a")  # "b" становится самым старым
+        await cache.set("c", b"3")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == b"1"
+        assert cache.stats.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_tiered_cache_warms_local_from_shared(self):
+        shared = InMemorySharedCache()
+        await shared.set("a", b"1")
+        cache = TieredCache(LRUCache(maxsize=10, ttl=60), shared=shared)
+
+        assert await cache.get("a") == b"1"
+        assert await cache.local.get("a") == b"1"
+
+        await cache.delete("a")
+        assert await shared.get("a") is None
+
+
+class TestUserServiceCache:
+    """Тесты read-through кэша в сервисе пользователей"""
+
+    @pytest.mark.asyncio
+    async def test_get_payload_reads_through_cache(self, mock_user_repository: Mock):
+        user = User(id=1, name="Cached", email="cached@example.com", version=1)
+        mock_user_repository.get_by_id = AsyncMock(return_value=user)
+        service = UserService(mock_user_repository, cache=LRUCache())
+
+        first = await service.get_payload_by_id(1)
+        second = await service.get_payload_by_id(1)
+
+        assert first == second
+        assert b'"name":"Cached"' in first
+        mock_user_repository.get_by_id.assert_called_once_with(1)
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates_cache(self, mock_user_repository: Mock):
+        cache = LRUCache()
+        await cache.set(user_cache_key(1), b"{}")
+        mock_user_repository.update = AsyncMock(
+            return_value=User(id=1, name="New", email="new@example.com")
+        )
+        service = UserService(mock_user_repository, cache=cache)
+
+        await service.update(1, UserUpdate(name="New"))
+
+        assert await cache.get(user_cache_key(1)) is None
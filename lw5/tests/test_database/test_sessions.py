@@ -0,0 +1,105 @@
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import LazySession, pool_options_from_env
+from app.models import Base, User
+from app.repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+async def pooled_engine(tmp_path):
+    """File-backed SQLite engine with a real queue pool"""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'sessions.db'}"
+    engine = create_async_engine(url, **pool_options_from_env(url))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(pooled_engine) -> async_sessionmaker:
+    return async_sessionmaker(
+        pooled_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+    )
+
+
+class TestLazySession:
+    """Tests for the per-request lazy session"""
+
+    @pytest.mark.asyncio
+    async def test_unused_session_is_never_created(self):
+        factory = Mock()
+        session = LazySession(factory)
+
+        assert session.in_transaction() is False
+        await session.close()
+
+        factory.assert_not_called()
+        assert session.started is False
+
+    @pytest.mark.asyncio
+    async def test_connection_checked_out_on_first_statement(
+        self, pooled_engine, session_factory
+    ):
+        pool = pooled_engine.sync_engine.pool
+        session = LazySession(session_factory)
+        repository = UserRepository(session)
+
+        assert pool.checkedout() == 0
+        assert await repository.get_version(1) is None
+        assert session.started is True
+        assert pool.checkedout() == 1
+
+        await session.close()
+        assert pool.checkedout() == 0
+
+
+class TestReleaseConnection:
+    """Tests for returning the connection right after the last read"""
+
+    @pytest.mark.asyncio
+    async def test_release_returns_connection_to_pool(
+        self, pooled_engine, session_factory
+    ):
+        pool = pooled_engine.sync_engine.pool
+        session = LazySession(session_factory)
+        repository = UserRepository(session)
+        user = User(name="Released", email="released@example.com")
+        session.add(user)
+        await session.commit()
+
+        loaded = await repository.get_by_id(user.id)
+        assert pool.checkedout() == 1
+
+        await repository.release()
+
+        assert pool.checkedout() == 0
+        assert session.in_transaction() is False
+        # expire_on_commit=False: loaded objects stay readable after release
+        assert loaded.email == "released@example.com"
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_release_keeps_pending_changes(self, pooled_engine, session_factory):
+        pool = pooled_engine.sync_engine.pool
+        session = LazySession(session_factory)
+        repository = UserRepository(session)
+
+        await repository.get_version(1)
+        session.add(User(name="Pending", email="pending@example.com"))
+        await repository.release()
+
+        assert session.in_transaction() is True
+        assert pool.checkedout() == 1
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_release_without_transaction_is_noop(self, session_factory):
+        session = LazySession(session_factory)
+
+        await UserRepository(session).release()
+
+        assert session.started is False
@@ -0,0 +1,16 @@
+from app.etags import etag_matches, make_etag
+
+
+class TestEtags:
+    """Tests for ETag helpers"""
+
+    def test_make_etag(self):
+        assert make_etag(7, 3) == '"7-3"'
+
+    def test_etag_matches(self):
+        etag = make_etag(7, 3)
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"7-2", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"7-2"', etag)
+        assert not etag_matches(None, etag)
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+
+import pytest
+from litestar import Litestar, MediaType, Request, Response, get, post
+from litestar.testing import TestClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.idempotency import (
+    IdempotencyRecord,
+    MemoryIdempotencyStore,
+    SqlIdempotencyStore,
+    idempotency_middleware,
+)
+from app.models import IdempotencyKey
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def stored_response(fingerprint: str = "abc") -> IdempotencyRecord:
+    return IdempotencyRecord(
+        fingerprint,
+        201,
+        [(b"content-type", b"application/json")],
+        b'{"id": 1}',
+    )
+
+
+class TestMemoryIdempotencyStore:
+    """Tests for the in-process idempotency store"""
+
+    @pytest.mark.asyncio
+    async def test_claim_then_replay(self):
+        store = MemoryIdempotencyStore(ttl=60)
+
+        assert await store.claim("key", "abc") is None
+        in_progress = await store.claim("key", "abc")
+        assert in_progress is not None and not in_progress.completed
+
+        await store.save("key", stored_response())
+        replay = await store.claim("key", "abc")
+        assert replay.status_code == 201
+        assert replay.body == b'{"id": 1}'
+
+    @pytest.mark.asyncio
+    async def test_release_frees_key_but_keeps_responses(self):
+        store = MemoryIdempotencyStore()
+
+        await store.claim("failed", "abc")
+        await store.release("failed")
+        assert await store.claim("failed", "abc") is None
+
+        await store.save("done", stored_response())
+        await store.release("done")
+        assert (await store.claim("done", "abc")).completed
+
+    @pytest.mark.asyncio
+    async def test_expired_keys_are_reclaimed_and_purged(self):
+        clock = FakeClock(1000.0)
+        store = MemoryIdempotencyStore(ttl=60, lock_seconds=5, clock=clock)
+        await store.claim("stuck", "abc")
+        await store.save("done", stored_response())
+
+        clock.now += 10
+        assert await store.claim("stuck", "other") is None
+        assert await store.purge_expired() == 0
+
+        clock.now += 60
+        assert await store.purge_expired() == 2
+
+
+class TestSqlIdempotencyStore:
+    """Tests for the idempotency_keys table store"""
+
+    @pytest.fixture
+    async def store(self, test_engine):
+        clock = FakeClock(datetime(2026, 1, 1))
+        session_factory = async_sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        yield SqlIdempotencyStore(session_factory, ttl=60, lock_seconds=5, clock=clock)
+        async with session_factory() as session:
+            await session.execute(delete(IdempotencyKey))
+            await session.commit()
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_claim_then_replay(self, store: SqlIdempotencyStore):
+        assert await store.claim("key", "abc") is None
+        await store.save("key", stored_response())
+
+        replay = await store.claim("key", "abc")
+
+        assert replay.fingerprint == "abc"
+        assert replay.status_code == 201
+        assert replay.headers == [(b"content-type", b"application/json")]
+        assert replay.body == b'{"id": 1}'
+
+    @pytest.mark.query_budget(6)
+    @pytest.mark.asyncio
+    async def test_in_progress_key_is_not_reclaimed_until_lock_expires(
+        self, store: SqlIdempotencyStore
+    ):
+        assert await store.claim("key", "abc") is None
+        assert not (await store.claim("key", "abc")).completed
+
+        store._clock.now += timedelta(seconds=10)
+        assert await store.claim("key", "other") is None
+
+    @pytest.mark.query_budget(4)
+    @pytest.mark.asyncio
+    async def test_release_and_purge(self, store: SqlIdempotencyStore):
+        await store.claim("failed", "abc")
+        await store.release("failed")
+        assert await store.claim("failed", "abc") is None
+
+        store._clock.now += timedelta(seconds=10)
+        assert await store.purge_expired() == 1
+
+
+class TestIdempotencyMiddleware:
+    """Tests for replaying responses by Idempotency-Key"""
+
+    @pytest.fixture
+    def client(self):
+        calls = []
+
+        @post("/items")
+        async def create_item(request: Request) -> Response:
+            body = await request.body()
+            calls.append(body)
+            return Response(
+                content=f"call {len(calls)}".encode(),
+                status_code=500 if body == b"fail" else 201,
+                media_type=MediaType.TEXT,
+            )
+
+        @get("/items")
+        async def list_items() -> Response:
+            calls.append(b"")
+            return Response(content=b"[]", media_type=MediaType.JSON)
+
+        app = Litestar(
+            route_handlers=[create_item, list_items],
+            middleware=[idempotency_middleware(MemoryIdempotencyStore())],
+            request_max_body_size=16,
+        )
+        with TestClient(app=app) as client:
+            client.calls = calls
+            yield client
+
+    def test_replay_skips_the_handler(self, client: TestClient):
+        headers = {"Idempotency-Key": "k1"}
+
+        first = client.post("/items", content=b"data", headers=headers)
+        second = client.post("/items", content=b"data", headers=headers)
+
+        assert first.status_code == second.status_code == 201
+        assert second.content == first.content == b"call 1"
+        assert second.headers["idempotent-replayed"] == "true"
+        assert client.calls == [b"data"]
+
+    def test_same_key_different_request_rejected(self, client: TestClient):
+        client.post("/items", content=b"data", headers={"Idempotency-Key": "k1"})
+
+        response = client.post(
+            "/items", content=b"other", headers={"Idempotency-Key": "k1"}
+        )
+
+        assert response.status_code == 422
+        assert client.calls == [b"data"]
+
+    def test_server_error_is_not_stored(self, client: TestClient):
+        headers = {"Idempotency-Key": "k1"}
+
+        client.post("/items", content=b"fail", headers=headers)
+        client.post("/items", content=b"fail", headers=headers)
+
+        assert client.calls == [b"fail", b"fail"]
+
+    def test_requests_without_key_pass_through(self, client: TestClient):
+        client.post("/items", content=b"data")
+        client.post("/items", content=b"data")
+        client.get("/items")
+
+        assert client.calls == [b"data", b"data", b""]
+
+    def test_invalid_key_rejected(self, client: TestClient):
+        response = client.post(
+            "/items", content=b"data", headers={"Idempotency-Key": "x" * 256}
+        )
+
+        assert response.status_code == 400
+        assert client.calls == []
+
+    def test_body_over_limit_rejected(self, client: TestClient):
+        response = client.post(
+            "/items", content=b"x" * 17, headers={"Idempotency-Key": "k1"}
+        )
+
+        assert response.status_code == 413
+        assert client.calls == []
+
+    def test_chunked_body_over_limit_rejected(self, client: TestClient):
+        def chunks():
+            for _ in range(4):
+                yield b"x" * 8
+
+        response = client.post(
+            "/items", content=chunks(), headers={"Idempotency-Key": "k1"}
+        )
+
+        assert response.status_code == 413
+        assert client.calls == []
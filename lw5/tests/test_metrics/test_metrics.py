@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import (
+    InstrumentedQueuePool,
+    pool_options_from_env,
+    register_pool_metrics,
+)
+from app.metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics:
+    """Tests for Prometheus metric primitives"""
+
+    def test_counter_and_gauge_render(self):
+        registry = Registry()
+        requests = registry.register(
+            Counter("requests_total", "Requests", labelnames=("status",))
+        )
+        in_flight = registry.register(Gauge("in_flight", "In flight"))
+
+        requests.labels("200").inc()
+        requests.labels(status="200").inc(2)
+        in_flight.inc()
+
+        output = registry.render()
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{status="200"} 3' in output
+        assert "in_flight 1" in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.register(
+            Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        )
+
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        output = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'latency_seconds_bucket{le="1"} 2' in output
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in output
+        assert "latency_seconds_count 3" in output
+
+    def test_duplicate_registration_fails(self):
+        registry = Registry()
+        registry.register(Counter("dup_total", "Dup"))
+
+        with pytest.raises(ValueError):
+            registry.register(Counter("dup_total", "Dup"))
+
+
+class TestPoolConfiguration:
+    """Tests for pool configuration from environment"""
+
+    def test_memory_sqlite_has_no_pool_sizing(self):
+        options = pool_options_from_env("sqlite+aiosqlite:///:memory:")
+
+        assert "pool_size" not in options
+        assert options["pool_pre_ping"] is False
+
+    def test_pool_options_from_env(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "20")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "5")
+        monkeypatch.setenv("DB_POOL_TIMEOUT", "2.5")
+        monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+
+        options = pool_options_from_env("postgresql+asyncpg://u:p@db/app")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 5
+        assert options["pool_timeout"] == 2.5
+        assert options["pool_recycle"] == 600
+        assert options["pool_pre_ping"] is True
+
+    @pytest.mark.asyncio
+    async def test_pool_metrics(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+        engine = create_async_engine(url, **pool_options_from_env(url))
+        register_pool_metrics(engine)
+        wait = REGISTRY.get("db_pool_checkout_wait_seconds")
+        checkouts_before = wait.labels().count
+
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                assert "db_pool_checked_out 1" in REGISTRY.render()
+        finally:
+            await engine.dispose()
+
+        assert wait.labels().count == checkouts_before + 1
@@ -0,0 +1,179 @@
+import os
+import sys
+
+import pytest
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from litestar.testing import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.replicas import STICKY_COOKIE, ReplicaSet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestReplicaSet:
+    """Tests for replica selection and health-based ejection"""
+
+    def test_round_robin_skips_ejected(self):
+        clock = FakeClock()
+        engines = [create_async_engine("sqlite+aiosqlite://") for _ in range(3)]
+        replicas = ReplicaSet(engines, eject_seconds=30, clock=clock)
+
+        assert [replicas.choose() for _ in range(4)] == engines + engines[:1]
+
+        replicas.eject(engines[1])
+        assert {replicas.choose() for _ in range(4)} == {engines[0], engines[2]}
+
+        # После eject_seconds реплика снова получает запросы
+        clock.now += 30
+        assert engines[1] in {replicas.choose() for _ in range(3)}
+
+        for engine in engines:
+            replicas.eject(engine)
+        assert replicas.choose() is None
+
+    def test_empty_set_reads_from_primary(self):
+        replicas = ReplicaSet()
+
+        assert not replicas.enabled
+        assert replicas.choose() is None
+
+    @pytest.mark.asyncio
+    async def test_connection_failure_ejects_replica(self):
+        broken = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db")
+        replicas = ReplicaSet([broken])
+
+        with pytest.raises(Exception):
+            async with broken.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        assert replicas.snapshot()[0]["healthy"] is False
+        assert replicas.choose() is None
+        await broken.dispose()
+
+
+class TestReplicaRouting:
+    """Tests for read routing and read-your-writes stickiness"""
+
+    @pytest.fixture(autouse=True)
+    async def setup_database(self):
+        """Основная БД и пустая реплика (отстающая на все записи)"""
+        from app.main import engine, replica_set, user_cache
+
+        await user_cache.clear()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        replica = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        replica_set.add(replica)
+        self.replica = replica
+
+        yield
+
+        replica_set.remove(replica)
+        await replica.dispose()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    @pytest.fixture
+    def test_client(self):
+        """Fixture for TestClient"""
+        from app.main import app
+
+        return TestClient(app=app)
+
+    @pytest.mark.query_budget(5)
+    def test_reads_go_to_replica_until_write(self, test_client: TestClient):
+        """Test GETs hit the replica unless the client has just written"""
+        response = test_client.post(
+            "/users", json={"name": "Replica", "email": "replica@example.com"}
+        )
+        assert response.status_code == 201
+        assert STICKY_COOKIE in response.cookies
+        user_id = response.json()["id"]
+
+        # Без cookie чтение идет в реплику, где пользователя еще нет
+        test_client.cookies.clear()
+        assert test_client.get(f"/users/{user_id}").status_code == 404
+        assert test_client.get("/users").json() == []
+
+        response = test_client.patch(f"/users/{user_id}", json={"name": "Written"})
+        assert response.status_code == 200
+
+        # Клиент только что писал - читает свою запись из основной БД
+        response = test_client.get(f"/users/{user_id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == "Written"
+
+    @pytest.mark.query_budget(6)
+    @pytest.mark.asyncio
+    async def test_lagging_replica_does_not_refill_cache(self, test_client: TestClient):
+        """Test a stale replica read is not cached past the writer's sticky window"""
+        response = test_client.post(
+            "/users", json={"name": "Old", "email": "lagging@example.com"}
+        )
+        user_id = response.json()["id"]
+        # Реплика догнала создание пользователя
+        async with self.replica.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, name, email, version) "
+                    "VALUES (:id, 'Old', 'lagging@example.com', 1)"
+                ),
+                {"id": user_id},
+            )
+
+        response = test_client.patch(f"/users/{user_id}", json={"name": "New"})
+        assert response.status_code == 200
+
+        # Другой клиент читает отстающую реплику сразу после записи
+        response = TestClient(app=test_client.app).get(f"/users/{user_id}")
+        assert response.json()["name"] == "Old"
+
+        # Реплика догнала запись, cookie писателя истекла
+        async with self.replica.begin() as conn:
+            await conn.execute(
+                text("UPDATE users SET name = 'New', version = 2 WHERE id = :id"),
+                {"id": user_id},
+            )
+        test_client.cookies.clear()
+
+        response = test_client.get(f"/users/{user_id}")
+        assert response.json()["name"] == "New"
+        assert response.headers["ETag"] == f'"{user_id}-2"'
+
+    @pytest.mark.query_budget(1)
+    def test_failed_write_does_not_pin_client(self, test_client: TestClient):
+        """Test the sticky cookie is set only for successful writes"""
+        response = test_client.patch("/users/999999", json={"name": "Nobody"})
+
+        assert response.status_code == 404
+        assert STICKY_COOKIE not in response.cookies
+
+    @pytest.mark.query_budget(0)
+    def test_admin_replicas(self, test_client: TestClient):
+        """Test replica health is reported"""
+        response = test_client.get("/admin/replicas")
+
+        assert response.status_code == 200
+        assert response.json()[0]["healthy"] is True
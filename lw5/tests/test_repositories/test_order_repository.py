@@ -0,0 +1,206 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Address, Order, Product, User, order_product
+from app.pagination import encode_cursor
+from app.repositories.order_repository import OrderRepository
+
+
+class TestOrderRepository:
+    """Тесты для репозитория заказов"""
+
+    @pytest.fixture
+    async def buyer(self, test_session: AsyncSession):
+        """Пользователь с адресом и два товара"""
+        user = User(name="Buyer", email="buyer@example.com")
+        test_session.add(user)
+        await test_session.flush()
+        address = Address(
+            user_id=user.id, street="Test Street", city="Test City", postal_code="1"
+        )
+        cheap = Product(name="Cheap", price=2.5, stock_quantity=10)
+        rare = Product(name="Rare", price=100.0, stock_quantity=1)
+        test_session.add_all([address, cheap, rare])
+        await test_session.commit()
+        return user, address, cheap, rare
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_get_products_for_order(self, test_session: AsyncSession, buyer):
+        """Тест загрузки товаров и проверки адреса одним запросом"""
+        user, address, cheap, rare = buyer
+        repository = OrderRepository(test_session)
+
+        rows = await repository.get_products_for_order(
+            [cheap.id, rare.id, 999999], user.id, address.id
+        )
+
+        assert sorted(row.id for row in rows) == sorted([cheap.id, rare.id])
+        assert all(row.address_ok for row in rows)
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_get_products_for_order_foreign_address(
+        self, test_session: AsyncSession, buyer
+    ):
+        """Тест: чужой адрес помечается в строках товаров"""
+        user, address, cheap, _ = buyer
+        repository = OrderRepository(test_session)
+
+        rows = await repository.get_products_for_order(
+            [cheap.id], user.id + 1, address.id
+        )
+
+        assert not rows[0].address_ok
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_reserve_stock_and_create(self, test_session: AsyncSession, buyer):
+        """Тест списания остатков и создания заказа с суммой, посчитанной в БД"""
+        user, address, cheap, rare = buyer
+        repository = OrderRepository(test_session)
+        items = {cheap.id: 4, rare.id: 1}
+
+        assert sorted(await repository.reserve_stock(items)) == sorted(items)
+        order = await repository.create(user.id, address.id, items)
+
+        assert order.id is not None
+        assert order.total_amount == 4 * 2.5 + 100.0
+        assert order.status == "pending"
+
+        stock = dict(
+            (
+                await test_session.execute(
+                    select(Product.id, Product.stock_quantity).order_by(Product.id)
+                )
+            ).all()
+        )
+        assert stock == {cheap.id: 6, rare.id: 0}
+
+        lines = (
+            await test_session.execute(
+                select(order_product.c.product_id, order_product.c.quantity)
+            )
+        ).all()
+        assert dict(lines) == items
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_reserve_stock_insufficient(self, test_session: AsyncSession, buyer):
+        """Тест: товар без остатка не списывается, откат возвращает остальные"""
+        _, _, cheap, rare = buyer
+        # После отката объекты сессии истекают - запоминаем ID заранее
+        cheap_id, rare_id = cheap.id, rare.id
+        repository = OrderRepository(test_session)
+
+        reserved = await repository.reserve_stock({cheap_id: 1, rare_id: 2})
+        assert reserved == [cheap_id]
+
+        await repository.rollback()
+        stock = (
+            await test_session.execute(
+                select(Product.stock_quantity).where(Product.id == cheap_id)
+            )
+        ).scalar_one()
+        assert stock == 10
+        assert (await test_session.execute(select(Order.id))).first() is None
+
+    @pytest.fixture
+    async def history(self, test_session: AsyncSession, buyer):
+        """Пять заказов пользователя, два с одинаковым created_at"""
+        user, address, cheap, rare = buyer
+        times = [
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 3),
+            datetime(2024, 1, 2),
+            datetime(2024, 1, 3),
+            datetime(2024, 1, 4),
+        ]
+        orders = [
+            Order(
+                user_id=user.id, address_id=address.id, total_amount=1.0, created_at=t
+            )
+            for t in times
+        ]
+        test_session.add_all(orders)
+        await test_session.flush()
+        await test_session.execute(
+            insert(order_product),
+            [
+                {"order_id": orders[1].id, "product_id": cheap.id, "quantity": 2},
+                {"order_id": orders[1].id, "product_id": rare.id, "quantity": 1},
+            ],
+        )
+        await test_session.commit()
+        return user, orders
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_get_user_page(self, test_session: AsyncSession, history):
+        """Тест истории заказов: новые первыми, равные даты по id, без пропусков"""
+        user, orders = history
+        repository = OrderRepository(test_session)
+        expected = [
+            orders[4].id,
+            orders[1].id,
+            orders[3].id,
+            orders[2].id,
+            orders[0].id,
+        ]
+
+        first = await repository.get_user_page(user.id, count=2)
+        assert [o.id for o in first.items] == expected[:2]
+
+        second = await repository.get_user_page(
+            user.id, count=2, after=first.next_cursor
+        )
+        assert [o.id for o in second.items] == expected[2:4]
+
+        back = await repository.get_user_page(
+            user.id, count=2, before=second.prev_cursor
+        )
+        assert [o.id for o in back.items] == expected[:2]
+        assert back.prev_cursor is None
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_get_user_page_columns(self, test_session: AsyncSession, history):
+        """Тест: с columns страница - строки, связь products не трогается"""
+        user, _ = history
+        repository = OrderRepository(test_session)
+
+        page = await repository.get_user_page(
+            user.id, count=10, columns=["id", "created_at"]
+        )
+
+        assert len(page.items) == 5
+        assert page.next_cursor is None
+        assert len(page.items[0]) == 2
+
+    @pytest.mark.query_budget(0)
+    @pytest.mark.asyncio
+    async def test_get_user_page_invalid_cursor(self, test_session: AsyncSession):
+        """Тест отказа курсору без даты"""
+        repository = OrderRepository(test_session)
+
+        with pytest.raises(ValueError):
+            await repository.get_user_page(1, after=encode_cursor([1, 2]))
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_get_order_lines(self, test_session: AsyncSession, history):
+        """Тест позиций нескольких заказов одним запросом"""
+        _, orders = history
+        repository = OrderRepository(test_session)
+
+        lines = await repository.get_order_lines(
+            [orders[0].id, orders[1].id], columns=["id", "name"]
+        )
+
+        assert [(line[0], line[1], line[3]) for line in lines] == [
+            (orders[1].id, 2, "Cheap"),
+            (orders[1].id, 1, "Rare"),
+        ]
@@ -0,0 +1,190 @@
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+from app.repositories.product_repository import ProductRepository
+from app.schemas import ProductCreate, ProductSort, ProductUpdate
+
+
+class TestProductRepository:
+    """Тесты для репозитория товаров"""
+
+    @pytest.fixture
+    async def products(self, test_session: AsyncSession):
+        """Пять товаров с повторяющейся ценой для проверки тай-брейка по id"""
+        repository = ProductRepository(test_session)
+        created = []
+        for name, price in [
+            ("Delta", 30.0),
+            ("Alpha", 10.0),
+            ("Echo", 20.0),
+            ("Charlie", 20.0),
+            ("Bravo", 50.0),
+        ]:
+            created.append(
+                await repository.create(ProductCreate(name=name, price=price))
+            )
+        return created
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_create_and_update_product(self, test_session: AsyncSession):
+        """Тест создания и частичного обновления товара"""
+        repository = ProductRepository(test_session)
+
+        product = await repository.create(
+            ProductCreate(name="Widget", price=9.5, stock_quantity=3)
+        )
+        assert product.id is not None
+        assert product.created_at is not None
+
+        updated = await repository.update(product.id, ProductUpdate(price=12.0))
+        assert updated.price == 12.0
+        assert updated.name == "Widget"
+
+        assert await repository.update(999999, ProductUpdate(price=1.0)) is None
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_get_page_by_name(self, test_session: AsyncSession, products):
+        """Тест keyset-пагинации по имени вперед и назад"""
+        repository = ProductRepository(test_session)
+
+        first = await repository.get_page(ProductSort.NAME, count=2)
+        assert [p.name for p in first.items] == ["Alpha", "Bravo"]
+        assert first.prev_cursor is None
+
+        second = await repository.get_page(
+            ProductSort.NAME, count=2, after=first.next_cursor
+        )
+        assert [p.name for p in second.items] == ["Charlie", "Delta"]
+
+        back = await repository.get_page(
+            ProductSort.NAME, count=2, before=second.prev_cursor
+        )
+        assert [p.name for p in back.items] == ["Alpha", "Bravo"]
+        assert back.prev_cursor is None
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_get_page_by_price_ties(self, test_session: AsyncSession, products):
+        """Тест сортировки по цене: равные цены упорядочены по id без пропусков"""
+        repository = ProductRepository(test_session)
+
+        seen = []
+        after = None
+        while True:
+            page = await repository.get_page(ProductSort.PRICE, count=2, after=after)
+            seen.extend(page.items)
+            if page.next_cursor is None:
+                break
+            after = page.next_cursor
+
+        assert [p.price for p in seen] == [10.0, 20.0, 20.0, 30.0, 50.0]
+        assert [p.name for p in seen[1:3]] == ["Echo", "Charlie"]
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_get_page_invalid_cursor(self, test_session: AsyncSession, products):
+        """Тест отказа курсору с неподходящим для сортировки типом значения"""
+        repository = ProductRepository(test_session)
+        name_cursor = (await repository.get_page(ProductSort.NAME, count=1)).next_cursor
+
+        with pytest.raises(ValueError):
+            await repository.get_page(ProductSort.PRICE, after=name_cursor)
+
+    @pytest.mark.query_budget(2)
+    @pytest.mark.asyncio
+    async def test_get_many_and_columns(self, test_session: AsyncSession, products):
+        """Тест multi-get одним запросом и выборки отдельных колонок"""
+        repository = ProductRepository(test_session)
+        ids = [products[0].id, products[2].id, 999999]
+
+        found = await repository.get_many(ids)
+        assert sorted(p.id for p in found) == sorted(ids[:2])
+
+        row = await repository.get_by_id(products[1].id, columns=["id", "name"])
+        assert tuple(row) == (products[1].id, "Alpha")
+
+    @pytest.fixture
+    async def catalog(self, test_session: AsyncSession):
+        """Товары для полнотекстового поиска"""
+        repository = ProductRepository(test_session)
+        created = []
+        for name, description in [
+            ("Green pear", "Tastes a bit like an apple"),
+            ("Red apple", "Fresh apple from the garden"),
+            ("Apple juice", None),
+            ("Orange", "Citrus"),
+            ("Яблоко зеленое", "Кислое"),
+        ]:
+            created.append(
+                await repository.create(
+                    ProductCreate(name=name, price=1.0, description=description)
+                )
+            )
+        return created
+
+    @pytest.mark.query_budget(2)
+    @pytest.mark.asyncio
+    async def test_search_ranked_pages(self, test_session: AsyncSession, catalog):
+        """Тест поиска: совпадение в названии выше описания, страницы без пропусков"""
+        repository = ProductRepository(test_session)
+
+        first = await repository.search("apple", count=2)
+        assert first.next_cursor is not None
+        second = await repository.search("apple", count=2, after=first.next_cursor)
+        assert second.next_cursor is None
+
+        names = [p.name for p in first.items + second.items]
+        assert sorted(names) == ["Apple juice", "Green pear", "Red apple"]
+        # Green pear совпадает только описанием
+        assert names[-1] == "Green pear"
+
+    @pytest.mark.query_budget(3)
+    @pytest.mark.asyncio
+    async def test_search_follows_writes(self, test_session: AsyncSession, catalog):
+        """Тест: индекс поиска следует за изменением и удалением товаров"""
+        repository = ProductRepository(test_session)
+        juice = catalog[2]
+
+        await repository.update(juice.id, ProductUpdate(name="Orange juice"))
+        page = await repository.search("orange juice", columns=["id", "name"])
+        assert page.items == [(juice.id, "Orange juice")]
+
+        page = await repository.search("яблоко", columns=["id"])
+        assert page.items == [(catalog[4].id,)]
+
+    @pytest.mark.query_budget(4)
+    @pytest.mark.asyncio
+    async def test_stock_update_skips_search_index(
+        self, test_session: AsyncSession, catalog
+    ):
+        """Тест: изменение остатка не переиндексирует товар (горячий путь заказов)"""
+        product_id = catalog[1].id
+
+        async def total_changes() -> int:
+            result = await test_session.execute(text("SELECT total_changes()"))
+            return result.scalar_one()
+
+        before = await total_changes()
+        await test_session.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock_quantity=Product.stock_quantity - 1)
+        )
+        # Изменена только строка products, триггер FTS не сработал
+        assert await total_changes() - before == 1
+
+        page = await ProductRepository(test_session).search("red", columns=["id"])
+        assert page.items == [(product_id,)]
+
+    @pytest.mark.query_budget(0)
+    @pytest.mark.asyncio
+    async def test_search_rejects_empty_query(self, test_session: AsyncSession):
+        """Тест: запрос без слов отклоняется до обращения к БД"""
+        repository = ProductRepository(test_session)
+
+        with pytest.raises(ValueError):
+            await repository.search('"*" :')
@@ -1,11 +1,22 @@
 import uuid
+from datetime import datetime
 
 import pytest
-from app.models import User
-from app.repositories.user_repository import UserRepository
-from app.schemas import UserCreate, UserUpdate
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.bench.common import StatementCounter
+from app.models import Address, User
+from app.repositories.loading import LoadProfile
+from app.repositories.user_repository import (
+    BULK_CHUNK_SIZE,
+    MAX_QUERY_PARAMS,
+    UserRepository,
+)
+from app.schemas import UserCreate, UserUpdate
+
 
 class TestUserRepository:
     """Тесты для репозитория пользователей"""
@@ -24,6 +35,7 @@ class TestUserRepository:
             "description": "Test description",
         }
 
+    @pytest.mark.query_budget(1)
     @pytest.mark.asyncio
     async def test_create_user(self, test_session: AsyncSession, user_data: dict):
         """Тест создания пользователя"""
@@ -37,6 +49,22 @@ class TestUserRepository:
         assert user.email == user_data["email"]
         assert user.description == user_data["description"]
 
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_create_user_single_statement(
+        self, test_engine, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест создания пользователя одним INSERT ... RETURNING без refresh"""
+        repository = UserRepository(test_session)
+
+        with StatementCounter(test_engine) as counter:
+            user = await repository.create(UserCreate(**user_data))
+
+        assert user.created_at is not None
+        assert counter.counts.statements == 1
+        assert counter.statements[0].lstrip().upper().startswith("INSERT")
+
+    @pytest.mark.query_budget(2)
     @pytest.mark.asyncio
     async def test_get_by_id(self, test_session: AsyncSession, user_data: dict):
         """Тест получения пользователя по ID"""
@@ -52,6 +80,65 @@ class TestUserRepository:
         assert retrieved_user.name == user_data["name"]
         assert retrieved_user.email == user_data["email"]
 
+    @pytest.mark.query_budget(6)
+    @pytest.mark.asyncio
+    async def test_get_by_id_load_profiles(
+        self, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест профилей загрузки связей"""
+        repository = UserRepository(test_session)
+        created_user = await repository.create(UserCreate(**user_data))
+        test_session.add(
+            Address(
+                user_id=created_user.id,
+                street="Test Street",
+                city="Test City",
+                postal_code="12345",
+            )
+        )
+        await test_session.commit()
+        test_session.expunge_all()
+
+        # По умолчанию связи не загружаются и не подгружаются неявно
+        user = await repository.get_by_id(created_user.id)
+        with pytest.raises(InvalidRequestError):
+            _ = user.addresses
+        test_session.expunge_all()
+
+        user = await repository.get_by_id(created_user.id, LoadProfile.SUMMARY)
+        assert [address.street for address in user.addresses] == ["Test Street"]
+        assert user.orders == []
+
+    @pytest.mark.asyncio
+    async def test_get_by_filter_no_n_plus_one(
+        self, test_session: AsyncSession, query_recorder
+    ):
+        """Тест: число запросов не зависит от числа пользователей в выборке"""
+        repository = UserRepository(test_session)
+        for i in range(5):
+            user = await repository.create(
+                UserCreate(
+                    name=f"Budget User {i}",
+                    email=f"budget-{i}-{uuid.uuid4().hex[:8]}@example.com",
+                )
+            )
+            test_session.add(
+                Address(
+                    user_id=user.id,
+                    street=f"Street {i}",
+                    city="Test City",
+                    postal_code="12345",
+                )
+            )
+        await test_session.commit()
+        test_session.expunge_all()
+
+        # users + selectin по адресам и заказам
+        with query_recorder.assert_max_queries(3):
+            users = await repository.get_by_filter(count=5, profile=LoadProfile.SUMMARY)
+            assert all(len(user.addresses) == 1 for user in users)
+
+    @pytest.mark.query_budget(1)
     @pytest.mark.asyncio
     async def test_get_by_id_not_found(self, test_session: AsyncSession):
         """Тест получения несуществующего пользователя"""
@@ -61,6 +148,7 @@ class TestUserRepository:
 
         assert user is None
 
+    @pytest.mark.query_budget(5)
     @pytest.mark.asyncio
     async def test_get_by_filter(self, test_session: AsyncSession):
         """Тест получения пользователей с фильтрацией"""
@@ -97,6 +185,181 @@ class TestUserRepository:
         if filtered_users:
             assert filtered_users[0].name == "User 1"
 
+    @pytest.mark.query_budget(9)
+    @pytest.mark.asyncio
+    async def test_get_by_filter_whitelisted_filters(self, test_session: AsyncSession):
+        """Тест фильтров по префиксу имени, дате создания и списку ID"""
+        repository = UserRepository(test_session)
+        names = ["Alice", "alina", "Bob", "Al_x"]
+        users = [
+            await repository.create(
+                UserCreate(name=name, email=f"{i}-{uuid.uuid4().hex[:8]}@example.com")
+            )
+            for i, name in enumerate(names)
+        ]
+
+        by_prefix = await repository.get_by_filter(count=10, name_prefix="AL")
+        assert [user.name for user in by_prefix] == ["Alice", "alina", "Al_x"]
+
+        # "_" не должен работать как шаблон LIKE
+        escaped = await repository.get_by_filter(count=10, name_prefix="al_")
+        assert [user.name for user in escaped] == ["Al_x"]
+
+        by_ids = await repository.get_by_filter(
+            count=10, ids=[users[0].id, users[2].id]
+        )
+        assert [user.name for user in by_ids] == ["Alice", "Bob"]
+
+        created_at = users[0].created_at
+        assert await repository.get_by_filter(count=10, created_before=created_at) == []
+        assert len(
+            await repository.get_by_filter(count=10, created_after=created_at)
+        ) == len(names)
+
+    @pytest.mark.query_budget(9)
+    @pytest.mark.asyncio
+    async def test_get_page_by_cursor(self, test_session: AsyncSession):
+        """Тест keyset-пагинации по курсору"""
+        repository = UserRepository(test_session)
+
+        created = []
+        for i in range(5):
+            created.append(
+                await repository.create(
+                    UserCreate(
+                        name=f"Cursor User {i}",
+                        email=f"cursor{i}-{uuid.uuid4().hex[:8]}@example.com",
+                    )
+                )
+            )
+        ids = [user.id for user in created]
+
+        first = await repository.get_page(count=2)
+        assert [user.id for user in first.items] == ids[:2]
+        assert first.next_cursor is not None
+        assert first.prev_cursor is None
+
+        second = await repository.get_page(count=2, after=first.next_cursor)
+        assert [user.id for user in second.items] == ids[2:4]
+
+        last = await repository.get_page(count=2, after=second.next_cursor)
+        assert [user.id for user in last.items] == ids[4:]
+        assert last.next_cursor is None
+
+        back = await repository.get_page(count=2, before=last.prev_cursor)
+        assert [user.id for user in back.items] == ids[2:4]
+        assert back.prev_cursor is not None
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_get_rows_by_columns(self, test_session: AsyncSession):
+        """Тест выборки колонок строками Row вместо ORM-объектов"""
+        repository = UserRepository(test_session)
+        for i in range(3):
+            await repository.create(
+                UserCreate(
+                    name=f"Row User {i}",
+                    email=f"row{i}-{uuid.uuid4().hex[:8]}@example.com",
+                )
+            )
+
+        rows = await repository.get_by_filter(count=2, columns=["id", "name"])
+        assert [tuple(row._fields) for row in rows] == [("id", "name")] * 2
+        assert not any(isinstance(row, User) for row in rows)
+
+        page = await repository.get_page(count=2, after=None, columns=["id"])
+        assert [row.id for row in page.items] == [row.id for row in rows]
+        assert page.next_cursor is not None
+
+    @pytest.mark.query_budget(4)
+    @pytest.mark.asyncio
+    async def test_get_many(self, test_session: AsyncSession):
+        """Тест получения пользователей по списку ID одним запросом"""
+        repository = UserRepository(test_session)
+        users = [
+            await repository.create(
+                UserCreate(
+                    name=f"Many User {i}",
+                    email=f"many{i}-{uuid.uuid4().hex[:8]}@example.com",
+                )
+            )
+            for i in range(3)
+        ]
+
+        found = await repository.get_many([users[2].id, users[0].id, 999_999])
+
+        assert sorted(user.id for user in found) == sorted([users[0].id, users[2].id])
+        assert await repository.get_many([]) == []
+
+    @pytest.mark.query_budget(0)
+    @pytest.mark.asyncio
+    async def test_get_page_invalid_cursor(self, test_session: AsyncSession):
+        """Тест обработки поврежденного курсора"""
+        repository = UserRepository(test_session)
+
+        with pytest.raises(ValueError):
+            await repository.get_page(count=2, after="not-a-cursor")
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_bulk_create_skips_existing_emails(self, test_session: AsyncSession):
+        """Тест пакетного создания с конфликтами по email"""
+        repository = UserRepository(test_session)
+        existing = await repository.create(
+            UserCreate(name="Existing", email="bulk-existing@example.com")
+        )
+
+        users_data = [
+            UserCreate(name=f"Bulk {i}", email=f"bulk-{i}@example.com")
+            for i in range(5)
+        ]
+        users_data.append(UserCreate(name="Dup", email=existing.email))
+
+        created = await repository.bulk_create(users_data, chunk_size=2)
+
+        assert sorted(user.email for user in created) == sorted(
+            f"bulk-{i}@example.com" for i in range(5)
+        )
+        assert all(user.id is not None for user in created)
+        assert len(await repository.get_by_filter(count=100)) == 6
+
+    def test_bulk_chunk_fits_parameter_limit(self):
+        """Тест: полная пачка bulk_create укладывается в лимит параметров"""
+        rows = [
+            {
+                **UserCreate(name="Bulk", email=f"bulk-{i}@example.com").model_dump(),
+                "created_at": datetime.utcnow(),
+            }
+            for i in range(BULK_CHUNK_SIZE)
+        ]
+        query = postgresql.insert(User).values(rows).returning(User)
+        compiled = query.compile(dialect=postgresql.dialect())
+
+        assert len(compiled.params) <= MAX_QUERY_PARAMS
+
+    @pytest.mark.query_budget(2)
+    @pytest.mark.asyncio
+    async def test_stream_by_filter_batches(self, test_session: AsyncSession):
+        """Тест выгрузки пользователей порциями серверного курсора"""
+        repository = UserRepository(test_session)
+        await repository.bulk_create(
+            [
+                UserCreate(name=f"Stream {i}", email=f"stream-{i}@example.com")
+                for i in range(5)
+            ]
+        )
+
+        batches = [
+            rows
+            async for rows in repository.stream_by_filter(["id", "email"], batch_size=2)
+        ]
+
+        assert [len(rows) for rows in batches] == [2, 2, 1]
+        assert [row.email for rows in batches for row in rows] == [
+            f"stream-{i}@example.com" for i in range(5)
+        ]
+
+    @pytest.mark.query_budget(2)
     @pytest.mark.asyncio
     async def test_update_user(self, test_session: AsyncSession):
         """Тест обновления пользователя"""
@@ -121,6 +384,7 @@ class TestUserRepository:
         assert updated_user.email == new_email
         assert updated_user.description == "Updated description"
 
+    @pytest.mark.query_budget(1)
     @pytest.mark.asyncio
     async def test_update_user_not_found(self, test_session: AsyncSession):
         """Тест обновления несуществующего пользователя"""
@@ -131,6 +395,7 @@ class TestUserRepository:
 
         assert updated_user is None
 
+    @pytest.mark.query_budget(3)
     @pytest.mark.asyncio
     async def test_delete_user(self, test_session: AsyncSession):
         """Тест удаления пользователя"""
@@ -152,6 +417,93 @@ class TestUserRepository:
         user_after_delete = await repository.get_by_id(created_user.id)
         assert user_after_delete is None
 
+    @pytest.mark.query_budget(2)
+    @pytest.mark.asyncio
+    async def test_update_user_single_statement(
+        self, test_engine, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест обновления одним UPDATE ... RETURNING без предварительного SELECT"""
+        repository = UserRepository(test_session)
+        created_user = await repository.create(UserCreate(**user_data))
+
+        with StatementCounter(test_engine) as counter:
+            updated_user = await repository.update(
+                created_user.id, UserUpdate(name="Renamed")
+            )
+
+        assert updated_user.name == "Renamed"
+        assert updated_user.email == user_data["email"]
+        assert counter.counts.statements == 1
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_update_bumps_version(
+        self, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест увеличения версии и updated_at при каждом обновлении"""
+        repository = UserRepository(test_session)
+        created_user = await repository.create(UserCreate(**user_data))
+        assert created_user.version == 1
+        assert await repository.get_version(created_user.id) == 1
+
+        first = await repository.update(created_user.id, UserUpdate(name="First"))
+        assert first.version == 2
+        assert first.updated_at >= created_user.updated_at
+
+        second = await repository.update(created_user.id, UserUpdate(name="Second"))
+        assert second.version == 3
+        assert await repository.get_version(999_999) is None
+
+    @pytest.mark.query_budget(5)
+    @pytest.mark.asyncio
+    async def test_update_with_expected_version(
+        self, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест оптимистической блокировки: UPDATE ... WHERE version = :v"""
+        repository = UserRepository(test_session)
+        created_user = await repository.create(UserCreate(**user_data))
+
+        updated = await repository.update(
+            created_user.id, UserUpdate(name="Fresh"), expected_version=1
+        )
+        assert updated.version == 2
+
+        # Версия 1 уже устарела - строка не меняется
+        stale = await repository.update(
+            created_user.id, UserUpdate(name="Stale"), expected_version=1
+        )
+        assert stale is None
+        assert await repository.get_version(created_user.id) == 2
+        assert (
+            await repository.update(created_user.id, UserUpdate(), expected_version=1)
+            is None
+        )
+
+    @pytest.mark.query_budget(4)
+    @pytest.mark.asyncio
+    async def test_delete_user_cascades_addresses(
+        self, test_session: AsyncSession, user_data: dict
+    ):
+        """Тест каскадного удаления адресов на стороне БД"""
+        repository = UserRepository(test_session)
+        created_user = await repository.create(UserCreate(**user_data))
+        test_session.add(
+            Address(
+                user_id=created_user.id,
+                street="Test Street",
+                city="Test City",
+                postal_code="12345",
+            )
+        )
+        await test_session.commit()
+
+        deleted = await repository.delete(created_user.id)
+
+        assert deleted is True
+        result = await test_session.execute(select(Address))
+        assert result.scalars().all() == []
+
+    @pytest.mark.query_budget(1)
     @pytest.mark.asyncio
     async def test_delete_user_not_found(self, test_session: AsyncSession):
         """Тест удаления несуществующего пользователя"""
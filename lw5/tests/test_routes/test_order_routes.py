@@ -0,0 +1,122 @@
+import os
+import sys
+
+import pytest
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from litestar.testing import TestClient
+
+from app.models import Base
+
+
+class TestOrderRoutes:
+    """Tests for order placement endpoint"""
+
+    @pytest.fixture(autouse=True)
+    async def setup_database(self):
+        """Создание таблиц перед всеми тестами класса"""
+        from app.main import catalog_cache, engine
+
+        await catalog_cache.clear()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        yield
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    @pytest.fixture
+    def test_client(self):
+        """Fixture for TestClient"""
+        from app.main import app
+
+        return TestClient(app=app)
+
+    @pytest.fixture
+    async def buyer(self):
+        """User with an address and a product with stock 2"""
+        from app.main import async_session_factory
+        from app.models import Address, Product, User
+
+        async with async_session_factory() as session:
+            user = User(name="Buyer", email="route-buyer@example.com")
+            session.add(user)
+            await session.flush()
+            address = Address(
+                user_id=user.id, street="Street", city="City", postal_code="1"
+            )
+            product = Product(name="Hot", price=5.0, stock_quantity=2)
+            session.add_all([address, product])
+            await session.commit()
+            return user.id, address.id, product.id
+
+    @pytest.mark.query_budget(9)
+    def test_create_order(self, test_client: TestClient, buyer):
+        """Test order placement and 409 once stock runs out"""
+        user_id, address_id, product_id = buyer
+        order = {
+            "user_id": user_id,
+            "address_id": address_id,
+            "items": [{"product_id": product_id, "quantity": 2}],
+        }
+
+        response = test_client.post("/orders", json=order)
+        assert response.status_code == 201, response.text
+        data = response.json()
+        assert data["total_amount"] == 10.0
+        assert data["items"] == [{"product_id": product_id, "quantity": 2}]
+
+        # Остаток 0: отказ уже по прочитанному остатку, без UPDATE
+        response = test_client.post("/orders", json=order)
+        assert response.status_code == 409
+
+        product = test_client.get(f"/products/{product_id}").json()
+        assert product["stock_quantity"] == 0
+
+        order["items"] = [{"product_id": 999999, "quantity": 1}]
+        assert test_client.post("/orders", json=order).status_code == 400
+
+    @pytest.mark.query_budget(13)
+    def test_get_user_orders(self, test_client: TestClient, buyer):
+        """Test order history paging and include=products"""
+        user_id, address_id, product_id = buyer
+        order_ids = []
+        for _ in range(2):
+            response = test_client.post(
+                "/orders",
+                json={
+                    "user_id": user_id,
+                    "address_id": address_id,
+                    "items": [{"product_id": product_id, "quantity": 1}],
+                },
+            )
+            order_ids.append(response.json()["id"])
+
+        response = test_client.get(f"/users/{user_id}/orders", params={"count": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert [o["id"] for o in data] == [order_ids[1]]
+        assert "products" not in data[0]
+
+        response = test_client.get(
+            f"/users/{user_id}/orders",
+            params={
+                "count": 1,
+                "after": response.headers["X-Next-Cursor"],
+                "include": "products",
+            },
+        )
+        data = response.json()
+        assert [o["id"] for o in data] == [order_ids[0]]
+        assert data[0]["products"][0]["quantity"] == 1
+        assert data[0]["products"][0]["product"]["id"] == product_id
+        assert "X-Next-Cursor" not in response.headers
+
+        assert test_client.get("/users/999999/orders").status_code == 404
+        response = test_client.get(f"/users/{user_id}/orders", params={"after": "x"})
+        assert response.status_code == 400
@@ -0,0 +1,137 @@
+import os
+import sys
+
+import pytest
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from litestar.testing import TestClient
+
+from app.models import Base
+
+
+class TestProductRoutes:
+    """Tests for product catalog endpoints"""
+
+    @pytest.fixture(autouse=True)
+    async def setup_database(self):
+        """Создание таблиц перед всеми тестами класса"""
+        from app.main import catalog_cache, engine
+
+        await catalog_cache.clear()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        yield
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    @pytest.fixture
+    def test_client(self):
+        """Fixture for TestClient"""
+        from app.main import app
+
+        return TestClient(app=app)
+
+    def create_products(self, test_client: TestClient) -> list:
+        products = []
+        for name, price in [("Gamma", 3.0), ("Alpha", 2.0), ("Beta", 1.0)]:
+            response = test_client.post(
+                "/products", json={"name": name, "price": price, "stock_quantity": 5}
+            )
+            assert response.status_code == 201, response.text
+            products.append(response.json())
+        return products
+
+    @pytest.mark.query_budget(5)
+    def test_get_product_cached(self, test_client: TestClient):
+        """Test single product read is served from the catalog cache"""
+        product = self.create_products(test_client)[0]
+
+        first = test_client.get(f"/products/{product['id']}")
+        second = test_client.get(f"/products/{product['id']}")
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert first.json()["name"] == "Gamma"
+
+        assert test_client.get("/products/999999").status_code == 404
+
+    @pytest.mark.query_budget(6)
+    def test_list_products_keyset(self, test_client: TestClient):
+        """Test catalog listing by price with cursor headers"""
+        self.create_products(test_client)
+
+        response = test_client.get("/products", params={"sort": "price", "count": 2})
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()] == ["Beta", "Alpha"]
+        next_cursor = response.headers["X-Next-Cursor"]
+
+        response = test_client.get(
+            "/products", params={"sort": "price", "count": 2, "after": next_cursor}
+        )
+        assert [p["name"] for p in response.json()] == ["Gamma"]
+        assert "X-Next-Cursor" not in response.headers
+
+        # Повторный запрос первой страницы берется из кэша
+        cached = test_client.get("/products", params={"sort": "price", "count": 2})
+        assert cached.headers["X-Next-Cursor"] == next_cursor
+
+        invalid = test_client.get("/products", params={"after": "garbage"})
+        assert invalid.status_code == 400
+
+    @pytest.mark.query_budget(6)
+    def test_update_invalidates_catalog_cache(self, test_client: TestClient):
+        """Test product write invalidates cached listing and product"""
+        products = self.create_products(test_client)
+
+        assert test_client.get("/products").json()[0]["name"] == "Alpha"
+
+        response = test_client.patch(
+            f"/products/{products[1]['id']}", json={"name": "Zeta"}
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == "Zeta"
+
+        names = [p["name"] for p in test_client.get("/products").json()]
+        assert names == ["Beta", "Gamma", "Zeta"]
+
+    @pytest.mark.query_budget(4)
+    def test_get_products_by_ids(self, test_client: TestClient):
+        """Test multi-get keeps request order and reports missing IDs"""
+        products = self.create_products(test_client)
+        ids = [products[2]["id"], 999999, products[0]["id"]]
+
+        response = test_client.get("/products", params={"ids": ids})
+        assert response.status_code == 200
+        assert [p["id"] for p in response.json()] == [ids[0], ids[2]]
+        assert response.headers["X-Missing-Ids"] == "999999"
+
+        response = test_client.get("/products", params={"ids": ids, "after": "x"})
+        assert response.status_code == 400
+
+    @pytest.mark.query_budget(6)
+    def test_search_products(self, test_client: TestClient):
+        """Test full-text search with ranked cursor pagination"""
+        self.create_products(test_client)
+        test_client.patch("/products/1", json={"description": "Greek letter alpha"})
+
+        response = test_client.get(
+            "/products/search", params={"q": "alpha", "count": 1}
+        )
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()] == ["Alpha"]
+
+        response = test_client.get(
+            "/products/search",
+            params={"q": "alpha", "after": response.headers["X-Next-Cursor"]},
+        )
+        assert [p["name"] for p in response.json()] == ["Gamma"]
+        assert "X-Next-Cursor" not in response.headers
+
+        assert (
+            test_client.get("/products/search", params={"q": "!!"}).status_code == 400
+        )
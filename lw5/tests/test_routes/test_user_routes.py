@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import os
 import sys
 
@@ -7,10 +10,11 @@ os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from app.models import Base
 from litestar.testing import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine
 
+from app.models import Base
+
 
 class TestUserRoutes:
     """Tests for user API endpoints"""
@@ -18,7 +22,9 @@ class TestUserRoutes:
     @pytest.fixture(autouse=True)
     async def setup_database(self):
         """Создание таблиц перед всеми тестами класса"""
-        from app.main import engine
+        from app.main import engine, user_cache
+
+        await user_cache.clear()
 
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
@@ -35,6 +41,7 @@ class TestUserRoutes:
 
         return TestClient(app=app)
 
+    @pytest.mark.query_budget(1)
     def test_create_user_success(self, test_client: TestClient):
         """Test successful user creation via API"""
         user_data = {
@@ -59,6 +66,44 @@ class TestUserRoutes:
         assert data["email"] == user_data["email"]
         assert "id" in data
 
+    @pytest.mark.query_budget(6)
+    def test_create_user_idempotent_replay(self, test_client: TestClient):
+        """Test a retried POST with the same Idempotency-Key replays the response"""
+        user_data = {"name": "Retried User", "email": "retried@example.com"}
+        headers = {"Idempotency-Key": "create-retried-user"}
+
+        first = test_client.post("/users", json=user_data, headers=headers)
+        assert first.status_code == 201, first.text
+
+        retry = test_client.post("/users", json=user_data, headers=headers)
+        assert retry.status_code == 201, retry.text
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+        # Повтор не дошел до репозитория: пользователь создан один раз
+        users = test_client.get("/users").json()
+        assert [user["email"] for user in users] == ["retried@example.com"]
+
+    @pytest.mark.query_budget(5)
+    def test_create_user_idempotency_key_reused(self, test_client: TestClient):
+        """Test an Idempotency-Key cannot be reused for a different request"""
+        headers = {"Idempotency-Key": "reused-key"}
+        first = test_client.post(
+            "/users",
+            json={"name": "First", "email": "first@example.com"},
+            headers=headers,
+        )
+        assert first.status_code == 201, first.text
+
+        response = test_client.post(
+            "/users",
+            json={"name": "Second", "email": "second@example.com"},
+            headers=headers,
+        )
+
+        assert response.status_code == 422, response.text
+
+    @pytest.mark.query_budget(2)
     def test_get_all_users(self, test_client: TestClient):
         """Test get all users"""
         # Создаем пользователя
@@ -88,6 +133,194 @@ class TestUserRoutes:
         # Проверяем, что есть хотя бы один пользователь
         assert len(users) >= 1, f"Expected at least 1 user, got {len(users)}"
 
+    @pytest.mark.query_budget(5)
+    def test_get_all_users_cursor_pagination(self, test_client: TestClient):
+        """Test walking users list with cursors"""
+        for i in range(3):
+            create_response = test_client.post(
+                "/users",
+                json={"name": f"Cursor User {i}", "email": f"cursor-{i}@example.com"},
+            )
+            assert create_response.status_code == 201, create_response.text
+
+        response = test_client.get("/users", params={"count": 2})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == 2
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = test_client.get("/users", params={"count": 2, "after": cursor})
+        assert response.status_code == 200, response.text
+        users = response.json()
+        assert [user["name"] for user in users] == ["Cursor User 2"]
+        assert "X-Next-Cursor" not in response.headers
+
+        response = test_client.get("/users", params={"after": "broken"})
+        assert response.status_code == 400, response.text
+
+    @pytest.mark.query_budget(2)
+    def test_bulk_create_users(self, test_client: TestClient):
+        """Test bulk creation reports per-item email conflicts"""
+        test_client.post(
+            "/users", json={"name": "Existing", "email": "bulk-0@example.com"}
+        )
+
+        response = test_client.post(
+            "/users/bulk",
+            json=[
+                {"name": "Bulk 0", "email": "bulk-0@example.com"},
+                {"name": "Bulk 1", "email": "bulk-1@example.com"},
+                {"name": "Bulk 1 again", "email": "bulk-1@example.com"},
+                {"name": "Bulk 2", "email": "bulk-2@example.com"},
+            ],
+        )
+
+        assert response.status_code == 201, response.text
+        data = response.json()
+        assert [user["email"] for user in data["created"]] == [
+            "bulk-1@example.com",
+            "bulk-2@example.com",
+        ]
+        assert [conflict["index"] for conflict in data["conflicts"]] == [0, 2]
+
+    @pytest.mark.query_budget(0)
+    def test_bulk_create_users_invalid_item(self, test_client: TestClient):
+        """Test bulk creation validates every item"""
+        response = test_client.post(
+            "/users/bulk",
+            json=[
+                {"name": "Valid", "email": "valid@example.com"},
+                {"name": "Invalid", "email": "not-an-email"},
+            ],
+        )
+
+        assert response.status_code == 400, response.text
+
+    @pytest.mark.query_budget(5)
+    def test_get_all_users_filtered(self, test_client: TestClient):
+        """Test list filters on query parameters"""
+        for name in ["Filter Anna", "Filter Boris", "Other"]:
+            test_client.post(
+                "/users",
+                json={"name": name, "email": f"{name.split()[-1].lower()}@example.com"},
+            )
+
+        response = test_client.get("/users", params={"name_prefix": "filter"})
+        assert response.status_code == 200, response.text
+        assert [user["name"] for user in response.json()] == [
+            "Filter Anna",
+            "Filter Boris",
+        ]
+
+        response = test_client.get("/users", params={"email": "other@example.com"})
+        assert [user["name"] for user in response.json()] == ["Other"]
+
+        response = test_client.get(
+            "/users",
+            params={
+                "created_after": "2030-01-01T00:00:00",
+                "created_before": "2020-01-01T00:00:00",
+            },
+        )
+        assert response.status_code == 400, response.text
+
+    @pytest.mark.query_budget(4)
+    def test_get_users_by_ids(self, test_client: TestClient):
+        """Test multi-get keeps request order and reports missing IDs"""
+        ids = [
+            test_client.post(
+                "/users",
+                json={"name": f"Multi {i}", "email": f"multi-{i}@example.com"},
+            ).json()["id"]
+            for i in range(3)
+        ]
+
+        requested = [ids[2], 999999, ids[0]]
+        response = test_client.get("/users", params={"ids": requested})
+        assert response.status_code == 200, response.text
+        assert [user["id"] for user in response.json()] == [ids[2], ids[0]]
+        assert response.headers["X-Missing-Ids"] == "999999"
+
+        # Повторный запрос обслуживается из кэша без обращения к БД
+        response = test_client.get("/users", params={"ids": [ids[0], ids[2]]})
+        assert [user["name"] for user in response.json()] == ["Multi 0", "Multi 2"]
+        assert "X-Missing-Ids" not in response.headers
+
+        response = test_client.get(
+            "/users", params={"ids": [ids[0]], "name_prefix": "multi"}
+        )
+        assert response.status_code == 400, response.text
+
+    @pytest.mark.query_budget(4)
+    def test_export_users_ndjson(self, test_client: TestClient):
+        """Test streaming export as NDJSON"""
+        for i in range(3):
+            test_client.post(
+                "/users",
+                json={"name": f"Export User {i}", "email": f"export-{i}@example.com"},
+            )
+
+        response = test_client.get("/users/export")
+
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["email"] for line in lines] == [
+            f"export-{i}@example.com" for i in range(3)
+        ]
+
+    @pytest.mark.query_budget(3)
+    def test_export_users_csv_filtered(self, test_client: TestClient):
+        """Test streaming export as CSV with a filter"""
+        for i in range(2):
+            test_client.post(
+                "/users",
+                json={"name": f"Export User {i}", "email": f"export-{i}@example.com"},
+            )
+
+        response = test_client.get(
+            "/users/export", params={"format": "csv", "email": "export-1@example.com"}
+        )
+
+        assert response.status_code == 200, response.text
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == [
+            "id",
+            "name",
+            "email",
+            "description",
+            "created_at",
+            "updated_at",
+            "version",
+        ]
+        assert len(rows) == 2
+        assert rows[1][2] == "export-1@example.com"
+
+    @pytest.mark.query_budget(0)
+    def test_metrics_endpoint(self, test_client: TestClient):
+        """Test Prometheus metrics endpoint"""
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "db_pool_checkout_wait_seconds_bucket" in response.text
+
+    @pytest.mark.query_budget(1)
+    def test_metrics_record_requests_per_route(self, test_client: TestClient):
+        """Test request metrics are labelled with the route template"""
+        test_client.get("/users/999999")
+
+        response = test_client.get("/metrics")
+
+        assert (
+            'http_requests_total{method="GET",route="/users/{user_id}",'
+            'status="404"}' in response.text
+        )
+        assert (
+            'http_request_db_statements_count{method="GET",'
+            'route="/users/{user_id}"}' in response.text
+        )
+
+    @pytest.mark.query_budget(1)
     def test_get_user_by_id_not_found(self, test_client: TestClient):
         """Test get non-existent user"""
         response = test_client.get("/users/999999")
@@ -99,6 +332,7 @@ class TestUserRoutes:
             response.status_code == 404
         ), f"Expected 404, got {response.status_code}: {response.text}"
 
+    @pytest.mark.query_budget(2)
     def test_get_user_by_id_success(self, test_client: TestClient):
         """Test successful get user by ID"""
         # Сначала создаем пользователя и сохраняем его ID
@@ -143,6 +377,152 @@ class TestUserRoutes:
         assert data["name"] == "Get By ID Test"
         assert data["email"] == "getbyid-test@example.com"
 
+    @pytest.mark.query_budget(4)
+    def test_get_user_details(self, test_client: TestClient):
+        """Test get user with addresses and orders"""
+        create_response = test_client.post(
+            "/users",
+            json={"name": "Details Test", "email": "details-test@example.com"},
+        )
+        assert create_response.status_code == 201, create_response.text
+        user_id = create_response.json()["id"]
+
+        response = test_client.get(f"/users/{user_id}/details")
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["id"] == user_id
+        assert data["addresses"] == []
+        assert data["orders"] == []
+
+    @pytest.mark.query_budget(4)
+    def test_get_user_by_id_cached(self, test_client: TestClient):
+        """Test repeated get is served from cache and invalidated on update"""
+        create_response = test_client.post(
+            "/users",
+            json={"name": "Cache Test", "email": "cache-test@example.com"},
+        )
+        assert create_response.status_code == 201, create_response.text
+        user_id = create_response.json()["id"]
+
+        first = test_client.get(f"/users/{user_id}")
+        second = test_client.get(f"/users/{user_id}")
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+
+        stats = test_client.get("/admin/cache").json()["users"]
+        assert stats["hits"] >= 1
+
+        test_client.patch(f"/users/{user_id}", json={"name": "Cache Updated"})
+        response = test_client.get(f"/users/{user_id}")
+        assert response.json()["name"] == "Cache Updated"
+
+    @pytest.mark.query_budget(0)
+    def test_slow_queries_endpoint(self, test_client: TestClient):
+        """Test slow query log is exposed (disabled without a threshold)"""
+        response = test_client.get("/admin/slow-queries")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["enabled"] is False
+        assert data["queries"] == []
+
+    @pytest.mark.query_budget(6)
+    def test_get_user_conditional_etag(self, test_client: TestClient):
+        """Test strong ETag and 304 on matching If-None-Match"""
+        user_id = test_client.post(
+            "/users", json={"name": "ETag User", "email": "etag@example.com"}
+        ).json()["id"]
+
+        response = test_client.get(f"/users/{user_id}")
+        assert response.status_code == 200, response.text
+        etag = response.headers["ETag"]
+        assert etag == f'"{user_id}-1"'
+
+        # Ответ в кэше: 304 без обращения к БД
+        response = test_client.get(f"/users/{user_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304, response.text
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        test_client.patch(f"/users/{user_id}", json={"name": "ETag Renamed"})
+
+        response = test_client.get(
+            f"/users/{user_id}", headers={"If-None-Match": f"W/{etag}"}
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] == f'"{user_id}-2"'
+
+        response = test_client.get("/users/999999", headers={"If-None-Match": etag})
+        assert response.status_code == 404, response.text
+
+    @pytest.mark.query_budget(9)
+    def test_update_user_if_match(self, test_client: TestClient):
+        """Test optimistic concurrency with If-Match and the version field"""
+        user_id = test_client.post(
+            "/users", json={"name": "OCC User", "email": "occ@example.com"}
+        ).json()["id"]
+
+        response = test_client.patch(
+            f"/users/{user_id}",
+            json={"name": "OCC First"},
+            headers={"If-Match": f'"{user_id}-1"'},
+        )
+        assert response.status_code == 200, response.text
+        assert response.headers["ETag"] == f'"{user_id}-2"'
+
+        # Второй писатель с устаревшей версией не затирает изменения
+        response = test_client.patch(
+            f"/users/{user_id}",
+            json={"name": "OCC Lost"},
+            headers={"If-Match": f'"{user_id}-1"'},
+        )
+        assert response.status_code == 412, response.text
+
+        response = test_client.patch(
+            f"/users/{user_id}", json={"name": "OCC Lost", "version": 1}
+        )
+        assert response.status_code == 412, response.text
+
+        response = test_client.patch(
+            f"/users/{user_id}",
+            json={"name": "OCC Weak"},
+            headers={"If-Match": f'W/"{user_id}-2"'},
+        )
+        assert response.status_code == 412, response.text
+
+        response = test_client.patch(
+            f"/users/{user_id}", json={"name": "OCC Second", "version": 2}
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["version"] == 3
+
+        response = test_client.patch(
+            "/users/999999",
+            json={"name": "Nobody"},
+            headers={"If-Match": '"999999-1"'},
+        )
+        assert response.status_code == 404, response.text
+
+    @pytest.mark.query_budget(3)
+    def test_update_user_if_match_any(self, test_client: TestClient):
+        """Test If-Match: * updates any version but requires the user to exist"""
+        user_id = test_client.post(
+            "/users", json={"name": "Any User", "email": "any-version@example.com"}
+        ).json()["id"]
+
+        response = test_client.patch(
+            f"/users/{user_id}", json={"name": "Any Update"}, headers={"If-Match": "*"}
+        )
+        assert response.status_code == 200, response.text
+        assert response.headers["ETag"] == f'"{user_id}-2"'
+
+        response = test_client.patch(
+            "/users/999999", json={"name": "Nobody"}, headers={"If-Match": "*"}
+        )
+        assert response.status_code == 412, response.text
+
+    @pytest.mark.query_budget(2)
     def test_update_user_success(self, test_client: TestClient):
         """Test successful user update"""
         # Создаем пользователя
@@ -182,6 +562,7 @@ class TestUserRoutes:
         assert data["description"] == "Updated description"
         assert data["email"] == "update-test@example.com"  # Email не менялся
 
+    @pytest.mark.query_budget(3)
     def test_delete_user_success(self, test_client: TestClient):
         """Test successful user deletion"""
         # Создаем пользователя
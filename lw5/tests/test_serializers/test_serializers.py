@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models import User
+from app.schemas import (
+    AddressResponse,
+    OrderLineResponse,
+    OrderResponse,
+    OrderWithProductsResponse,
+    ProductResponse,
+    UserResponse,
+)
+from app.serializers import (
+    AddressStruct,
+    OrderLineStruct,
+    OrderStruct,
+    OrderWithProductsStruct,
+    ProductStruct,
+    UserStruct,
+    encode_objects,
+    encode_rows,
+    struct_fields,
+)
+
+
+class TestSerializers:
+    """Tests for msgspec response serialization"""
+
+    @pytest.mark.parametrize(
+        "struct, schema",
+        [
+            (UserStruct, UserResponse),
+            (AddressStruct, AddressResponse),
+            (ProductStruct, ProductResponse),
+            (OrderStruct, OrderResponse),
+            (OrderLineStruct, OrderLineResponse),
+            (OrderWithProductsStruct, OrderWithProductsResponse),
+        ],
+    )
+    def test_structs_mirror_response_schemas(self, struct, schema):
+        assert struct_fields(struct) == tuple(schema.model_fields)
+
+    def test_encode_rows_matches_pydantic(self):
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        users = [
+            User(
+                id=1,
+                name="Иван",
+                email="ivan@example.com",
+                description=None,
+                created_at=created_at,
+                version=1,
+            ),
+            User(
+                id=2,
+                name='Quote "Q"',
+                email="q@example.com",
+                description="Line\nbreak",
+                created_at=created_at,
+                version=1,
+            ),
+        ]
+        rows = [
+            tuple(getattr(user, field) for field in struct_fields(UserStruct))
+            for user in users
+        ]
+        expected = [
+            json.loads(UserResponse.model_validate(user).model_dump_json())
+            for user in users
+        ]
+
+        assert json.loads(encode_rows(UserStruct, rows)) == expected
+        assert json.loads(encode_objects(UserStruct, users)) == expected
+
+    def test_encode_empty(self):
+        assert encode_rows(UserStruct, []) == b"[]"
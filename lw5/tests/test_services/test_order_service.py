@@ -0,0 +1,138 @@
+import msgspec
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import LRUCache
+from app.exceptions import BadRequestException, ConflictException
+from app.models import Address, Product, User
+from app.repositories.order_repository import OrderRepository
+from app.schemas import OrderCreate
+from app.services.order_service import OrderService
+from app.services.product_service import product_cache_key
+
+
+class TestOrderService:
+    """Тесты оформления заказов с реальным репозиторием"""
+
+    @pytest.fixture
+    async def buyer(self, test_session: AsyncSession):
+        user = User(name="Buyer", email="order-service@example.com")
+        test_session.add(user)
+        await test_session.flush()
+        address = Address(
+            user_id=user.id, street="Test Street", city="Test City", postal_code="1"
+        )
+        product = Product(name="Hot", price=10.0, stock_quantity=3)
+        other = Product(name="Other", price=1.0, stock_quantity=100)
+        test_session.add_all([address, product, other])
+        await test_session.commit()
+        return user, address, product, other
+
+    @staticmethod
+    def order(user, address, *items) -> OrderCreate:
+        return OrderCreate(
+            user_id=user.id,
+            address_id=address.id,
+            items=[{"product_id": pid, "quantity": qty} for pid, qty in items],
+        )
+
+    async def stock(self, session: AsyncSession, product_id: int) -> int:
+        result = await session.execute(
+            select(Product.stock_quantity).where(Product.id == product_id)
+        )
+        return result.scalar_one()
+
+    @pytest.mark.asyncio
+    async def test_place_merges_items_and_invalidates_cache(
+        self, test_session: AsyncSession, buyer
+    ):
+        """Тест: повторы товара складываются, кэш товара сбрасывается"""
+        user, address, product, other = buyer
+        cache = LRUCache()
+        await cache.set(product_cache_key(product.id), b"{}")
+        service = OrderService(OrderRepository(test_session), catalog_cache=cache)
+
+        order, items = await service.place(
+            self.order(user, address, (product.id, 1), (other.id, 5), (product.id, 1))
+        )
+
+        assert [(i.product_id, i.quantity) for i in items] == [
+            (product.id, 2),
+            (other.id, 5),
+        ]
+        assert order.total_amount == 25.0
+        assert await self.stock(test_session, product.id) == 1
+        assert await cache.get(product_cache_key(product.id)) is None
+
+    @pytest.mark.asyncio
+    async def test_place_insufficient_stock_writes_nothing(
+        self, test_session: AsyncSession, buyer
+    ):
+        """Тест 409: при нехватке одного товара не списывается ни один"""
+        user, address, product, other = buyer
+        service = OrderService(OrderRepository(test_session))
+
+        with pytest.raises(ConflictException) as exc_info:
+            await service.place(
+                self.order(user, address, (other.id, 1), (product.id, 4))
+            )
+
+        assert str(product.id) in exc_info.value.detail
+        assert await self.stock(test_session, other.id) == 100
+        assert await self.stock(test_session, product.id) == 3
+
+    @pytest.mark.asyncio
+    async def test_place_lost_race_rolls_back(self, test_session: AsyncSession, buyer):
+        """Тест: остаток ушел между чтением и UPDATE - откат и 409"""
+        user, address, product, other = buyer
+        other_id = other.id
+        repository = OrderRepository(test_session)
+        read = repository.get_products_for_order
+
+        async def read_then_sell_out(*args):
+            rows = await read(*args)
+            # Конкурентный покупатель забирает весь остаток после нашего чтения
+            await repository.reserve_stock({product.id: 3})
+            return rows
+
+        repository.get_products_for_order = read_then_sell_out
+        service = OrderService(repository)
+
+        with pytest.raises(ConflictException):
+            await service.place(
+                self.order(user, address, (other.id, 1), (product.id, 1))
+            )
+
+        assert await self.stock(test_session, other_id) == 100
+
+    @pytest.mark.asyncio
+    async def test_place_validation(self, test_session: AsyncSession, buyer):
+        """Тест 400 для неизвестного товара и чужого адреса"""
+        user, address, product, _ = buyer
+        service = OrderService(OrderRepository(test_session))
+
+        with pytest.raises(BadRequestException):
+            await service.place(self.order(user, address, (999999, 1)))
+
+        stranger = User(name="Stranger", email="stranger@example.com")
+        test_session.add(stranger)
+        await test_session.commit()
+        with pytest.raises(BadRequestException):
+            await service.place(self.order(stranger, address, (product.id, 1)))
+
+    @pytest.mark.asyncio
+    async def test_get_user_page_item_count(self, test_session: AsyncSession, buyer):
+        """Тест: item_count страницы совпадает с числом заказов в теле"""
+        user, address, product, _ = buyer
+        service = OrderService(OrderRepository(test_session))
+
+        empty = await service.get_user_page(user.id)
+        assert empty.item_count == 0
+
+        await service.place(self.order(user, address, (product.id, 1)))
+        for include_products in (False, True):
+            page = await service.get_user_page(
+                user.id, include_products=include_products
+            )
+            assert page.item_count == len(msgspec.json.decode(page.body)) == 1
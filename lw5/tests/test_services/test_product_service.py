@@ -0,0 +1,40 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.cache import LRUCache
+from app.pagination import Page
+from app.repositories.product_repository import ProductRepository
+from app.schemas import ProductSort, ProductUpdate
+from app.services.product_service import ProductService
+
+
+class TestProductServiceCache:
+    """Тесты кэша каталога в сервисе товаров"""
+
+    @pytest.fixture
+    def product_repository(self) -> Mock:
+        repository = Mock(spec=ProductRepository)
+        row = (1, "Widget", 9.5, None, 3, None)
+        repository.get_page = AsyncMock(
+            return_value=Page(items=[row], next_cursor="next")
+        )
+        repository.update = AsyncMock(return_value=Mock())
+        return repository
+
+    @pytest.mark.asyncio
+    async def test_page_cached_until_write(self, product_repository: Mock):
+        """Тест: страница читается из кэша, запись сбрасывает кэш"""
+        service = ProductService(product_repository, cache=LRUCache())
+
+        first = await service.get_page(ProductSort.PRICE, count=1)
+        second = await service.get_page(ProductSort.PRICE, count=1)
+
+        assert bytes(second.body) == bytes(first.body)
+        assert second.next_cursor == "next"
+        assert second.prev_cursor is None
+        product_repository.get_page.assert_called_once()
+
+        await service.update(1, ProductUpdate(price=10.0))
+        await service.get_page(ProductSort.PRICE, count=1)
+        assert product_repository.get_page.call_count == 2
@@ -1,10 +1,16 @@
+import json
 import uuid
+from datetime import datetime
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+
+from app.cache import LRUCache
+from app.exceptions import PreconditionFailedException
 from app.models import User
+from app.repositories.loading import LoadProfile
 from app.schemas import UserCreate, UserUpdate
-from app.services.user_service import UserService
+from app.services.user_service import UserService, user_cache_key
 
 
 class TestUserServiceWithMock:
@@ -31,7 +37,9 @@ class TestUserServiceWithMock:
         assert user is not None
         assert user.id == 1
         assert user.name == "Test User"
-        mock_user_repository.get_by_id.assert_called_once_with(1)
+        mock_user_repository.get_by_id.assert_called_once_with(
+            1, profile=LoadProfile.SCALAR
+        )
 
     @pytest.mark.asyncio
     async def test_create_user_with_business_logic(self, mock_user_repository: Mock):
@@ -61,6 +69,54 @@ class TestUserServiceWithMock:
         assert user.description == "Пользователь Test User"
         mock_user_repository.create.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_many_uses_cache_and_preserves_order(
+        self, mock_user_repository: Mock
+    ):
+        """Тест multi-get: попадания из кэша, промахи одним запросом, порядок ID"""
+        cache = LRUCache()
+        await cache.set(user_cache_key(2), b'{"id":2,"name":"Cached"}')
+        created_at = datetime(2024, 1, 1)
+        row = (3, "From DB", "db@example.com", None, created_at)
+        mock_user_repository.get_many = AsyncMock(return_value=[_Row(row)])
+
+        service = UserService(mock_user_repository, cache=cache)
+        payloads, missing = await service.get_many([3, 2, 404, 3])
+
+        assert [json.loads(payload)["id"] for payload in payloads] == [3, 2, 3]
+        assert missing == [404]
+        mock_user_repository.get_many.assert_called_once()
+        assert mock_user_repository.get_many.call_args.args[0] == [3, 404]
+        # Найденный в БД пользователь попал в кэш
+        assert await cache.get(user_cache_key(3)) == payloads[0]
+
+    @pytest.mark.asyncio
+    async def test_update_version_conflict(self, mock_user_repository: Mock):
+        """Тест 412 при устаревшей ожидаемой версии"""
+        mock_user_repository.update = AsyncMock(return_value=None)
+        mock_user_repository.get_version = AsyncMock(return_value=5)
+
+        service = UserService(mock_user_repository)
+        with pytest.raises(PreconditionFailedException):
+            await service.update(1, UserUpdate(name="New", version=4))
+
+        mock_user_repository.update.assert_called_once()
+        assert mock_user_repository.update.call_args.kwargs == {"expected_version": 4}
+
+        # Строки нет - это не конфликт, а 404 в контроллере
+        mock_user_repository.get_version = AsyncMock(return_value=None)
+        assert (
+            await service.update(1, UserUpdate(name="New"), expected_version=4) is None
+        )
+
+
+class _Row(tuple):
+    """Минимальная замена sqlalchemy Row: кортеж с атрибутом id"""
+
+    @property
+    def id(self):
+        return self[0]
+
 
 class TestUserServiceWithRealRepository:
     """Тесты сервиса пользователей с реальным репозиторием"""
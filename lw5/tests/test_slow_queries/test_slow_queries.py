@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base
+from app.repositories.user_repository import UserRepository
+from app.schemas import UserCreate
+from app.slow_queries import SlowQueryLog, normalize_sql, parameters_shape
+
+
+class TestSlowQueryLog:
+    """Tests for the slow query recorder"""
+
+    @pytest.fixture
+    async def engine(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine
+        await engine.dispose()
+
+    def test_normalize_sql(self):
+        assert (
+            normalize_sql("SELECT *\n  FROM users\n WHERE id IN (?, ?, ?)")
+            == "SELECT * FROM users WHERE id IN (?...)"
+        )
+        assert (
+            normalize_sql("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)")
+            == "INSERT INTO t (a, b) VALUES (?...), ..."
+        )
+
+    def test_parameters_shape_hides_values(self):
+        assert parameters_shape((1, "secret@example.com")) == ["int", "str"]
+        assert parameters_shape({"email": "secret@example.com"}) == {"email": "str"}
+        assert parameters_shape([(1,), (2,)], executemany=True) == {
+            "rows": 2,
+            "row": ["int"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_records_statement_and_repository_method(self, engine):
+        slow_query_log = SlowQueryLog(threshold_ms=0)
+        slow_query_log.install(engine)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            repository = UserRepository(session)
+            user = await repository.create(
+                UserCreate(name="Slow", email="slow@example.com")
+            )
+            await repository.get_by_id(user.id)
+
+        latest = slow_query_log.entries()[0]
+        assert latest.caller == "UserRepository.get_by_id"
+        assert latest.statement.startswith("SELECT users.id")
+        assert latest.parameters == ["int"]
+        assert latest.duration_ms >= 0
+        # EXPLAIN снимается только на PostgreSQL
+        assert latest.plan is None
+
+        snapshot = slow_query_log.snapshot()
+        assert snapshot["enabled"] is True
+        assert snapshot["queries"][-1]["caller"] == "UserRepository.create"
+
+    @pytest.mark.asyncio
+    async def test_ring_buffer_and_threshold(self, engine):
+        slow_query_log = SlowQueryLog(threshold_ms=0, maxsize=2)
+        slow_query_log.install(engine)
+        async with engine.connect() as conn:
+            for i in range(3):
+                await conn.execute(text(f"SELECT {i}"))
+
+        assert [entry.statement for entry in slow_query_log.entries()] == [
+            "SELECT 2",
+            "SELECT 1",
+        ]
+        # Вне репозиториев источник не определяется
+        assert slow_query_log.entries()[0].caller is None
+
+        fast_log = SlowQueryLog(threshold_ms=60_000)
+        fast_log.install(engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        assert fast_log.entries() == []
+
+    @pytest.mark.asyncio
+    async def test_disabled_log_does_not_listen(self, engine):
+        slow_query_log = SlowQueryLog(threshold_ms=None)
+        slow_query_log.install(engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        assert slow_query_log.snapshot() == {
+            "enabled": False,
+            "threshold_ms": None,
+            "queries": [],
+        }
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+
+import pytest
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from litestar.testing import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.schema_check import SchemaMismatchError, check_schema, migration_heads
+
+# Worker startup (lifespan) against an already migrated database
+STARTUP_BUDGET_SECONDS = 0.5
+
+
+class TestStartupSchemaCheck:
+    """Tests for the startup migration-state check"""
+
+    @pytest.fixture
+    async def stamp(self):
+        """Create alembic_version in the app database and set its revision"""
+        from app.main import engine
+
+        async def _stamp(*revisions: str) -> None:
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+                await conn.execute(
+                    text("CREATE TABLE alembic_version (version_num VARCHAR(32))")
+                )
+                for revision in revisions:
+                    await conn.execute(
+                        text("INSERT INTO alembic_version VALUES (:revision)"),
+                        {"revision": revision},
+                    )
+
+        yield _stamp
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+    @pytest.fixture
+    async def at_head(self, stamp):
+        await stamp(*migration_heads())
+
+    @pytest.fixture
+    async def behind_head(self, stamp):
+        await stamp("5c455ad2f222")
+
+    def test_migration_heads_single_head(self):
+        assert len(migration_heads()) == 1
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.asyncio
+    async def test_check_passes_at_head(self, at_head):
+        from app.main import engine
+
+        await check_schema(engine)
+
+    @pytest.mark.asyncio
+    async def test_check_fails_behind_head(self, behind_head):
+        from app.main import engine
+
+        with pytest.raises(SchemaMismatchError, match="5c455ad2f222"):
+            await check_schema(engine)
+
+    @pytest.mark.asyncio
+    async def test_check_fails_without_alembic_version(self):
+        from app.main import engine
+
+        with pytest.raises(SchemaMismatchError, match="alembic upgrade head"):
+            await check_schema(engine)
+
+    @pytest.mark.asyncio
+    async def test_check_propagates_connection_errors(self, tmp_path):
+        """An unreachable database is not reported as missing migrations"""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'app.db'}"
+        )
+        try:
+            with pytest.raises(DBAPIError, match="unable to open database file"):
+                await check_schema(engine, heads={"head"})
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_check_propagates_errors_reading_alembic_version(self, stamp):
+        """Query errors on an existing alembic_version table propagate unchanged"""
+        from app.main import engine
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+            await conn.execute(text("CREATE TABLE alembic_version (revision TEXT)"))
+
+        with pytest.raises(DBAPIError, match="version_num"):
+            await check_schema(engine)
+
+    @pytest.mark.query_budget(1)
+    def test_startup_time_budget(self, at_head, monkeypatch):
+        """Worker startup issues one query and stays within the time budget"""
+        from app.main import app
+
+        monkeypatch.setenv("DB_SCHEMA_STARTUP", "check")
+
+        started = time.perf_counter()
+        with TestClient(app=app):
+            elapsed = time.perf_counter() - started
+
+        assert elapsed < STARTUP_BUDGET_SECONDS, f"startup took {elapsed:.3f} s"
+
+    def test_startup_fails_fast_on_mismatch(self, behind_head, monkeypatch):
+        from app.main import app
+
+        monkeypatch.setenv("DB_SCHEMA_STARTUP", "check")
+
+        # TestClient re-raises lifespan errors inside an exception group
+        with pytest.raises(BaseException) as exc_info:
+            with TestClient(app=app):
+                pass
+        assert exc_info.group_contains(SchemaMismatchError)